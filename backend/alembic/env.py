@@ -8,6 +8,9 @@ from alembic import context
 # Import your models' metadata
 from app.database import Base
 from app.models.user import User  # Import all your models
+from app.models.revoked_token import RevokedToken
+from app.models.exclusive_code import ExclusiveCode
+from app.models.campaign_job import CampaignJob
 from app.config import SQLALCHEMY_DATABASE_URL
 
 # this is the Alembic Config object, which provides
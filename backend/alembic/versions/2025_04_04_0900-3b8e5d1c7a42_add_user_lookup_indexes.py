@@ -0,0 +1,40 @@
+"""add user lookup indexes
+
+Revision ID: 3b8e5d1c7a42
+Revises: 29095d811c65
+Create Date: 2025-04-04 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b8e5d1c7a42'
+down_revision: Union[str, None] = '29095d811c65'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # OAuth callbacks: provider + provider account id
+    op.create_index(
+        'ix_users_provider_provider_user_id', 'users',
+        ['provider', 'provider_user_id'], unique=True
+    )
+    # Case-insensitive email lookups (signup, login, request-code)
+    op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email)')])
+    # Only rows with an outstanding code
+    op.create_index(
+        'ix_users_exclusive_code', 'users', ['exclusive_code'],
+        postgresql_where=sa.text('exclusive_code IS NOT NULL'),
+        sqlite_where=sa.text('exclusive_code IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_exclusive_code', table_name='users')
+    op.drop_index('ix_users_email_lower', table_name='users')
+    op.drop_index('ix_users_provider_provider_user_id', table_name='users')
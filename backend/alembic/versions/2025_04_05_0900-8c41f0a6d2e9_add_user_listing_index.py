@@ -0,0 +1,32 @@
+"""add user listing index
+
+Revision ID: 8c41f0a6d2e9
+Revises: 3b8e5d1c7a42
+Create Date: 2025-04-05 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c41f0a6d2e9'
+down_revision: Union[str, None] = '3b8e5d1c7a42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'sqlite':
+        # CURRENT_TIMESTAMP defaults were stored without microseconds, which
+        # sorts differently from the values SQLAlchemy writes; align them
+        op.execute(
+            "UPDATE users SET created_at = created_at || '.000000' "
+            "WHERE length(created_at) = 19"
+        )
+    op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_created_at_id', table_name='users')
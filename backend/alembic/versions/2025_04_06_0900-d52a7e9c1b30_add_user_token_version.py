@@ -0,0 +1,29 @@
+"""add user token version
+
+Revision ID: d52a7e9c1b30
+Revises: 8c41f0a6d2e9
+Create Date: 2025-04-06 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd52a7e9c1b30'
+down_revision: Union[str, None] = '8c41f0a6d2e9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'users',
+        sa.Column('token_version', sa.Integer(), server_default='0', nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'token_version')
@@ -0,0 +1,77 @@
+"""move exclusive codes to their own table
+
+Revision ID: a7c2e4f19b58
+Revises: 6f0b3a9d4e17
+Create Date: 2025-04-08 09:00:00.000000
+
+"""
+import hashlib
+import hmac
+from datetime import datetime, timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.config import SECRET_KEY, EXCLUSIVE_CODE_TTL_HOURS
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c2e4f19b58'
+down_revision: Union[str, None] = '6f0b3a9d4e17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def hash_code(user_id: str, code: str) -> str:
+    # Same as app.services.exclusive_codes.hash_code at this revision
+    message = f"{user_id}:{code.strip().upper()}".encode()
+    return hmac.new(SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+
+def upgrade() -> None:
+    codes = op.create_table(
+        'exclusive_codes',
+        sa.Column('code_hash', sa.String(), nullable=False),
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('used_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('code_hash')
+    )
+    op.create_index(op.f('ix_exclusive_codes_expires_at'), 'exclusive_codes', ['expires_at'], unique=False)
+    op.create_index(op.f('ix_exclusive_codes_user_id'), 'exclusive_codes', ['user_id'], unique=False)
+
+    # Outstanding codes keep working for a full lifetime from now, as
+    # their issue time was never recorded
+    now = datetime.utcnow()
+    rows = op.get_bind().execute(
+        sa.text('SELECT id, exclusive_code FROM users WHERE exclusive_code IS NOT NULL')
+    ).fetchall()
+    if rows:
+        op.bulk_insert(codes, [
+            {
+                'code_hash': hash_code(user_id, code),
+                'user_id': user_id,
+                'created_at': now,
+                'expires_at': now + timedelta(hours=EXCLUSIVE_CODE_TTL_HOURS),
+            }
+            for user_id, code in rows
+        ])
+
+    op.drop_index('ix_users_exclusive_code', table_name='users')
+    op.drop_column('users', 'exclusive_code')
+
+
+def downgrade() -> None:
+    # Codes are only stored hashed, so outstanding ones can't be moved back
+    op.add_column('users', sa.Column('exclusive_code', sa.String(), nullable=True))
+    op.create_index(
+        'ix_users_exclusive_code', 'users', ['exclusive_code'],
+        postgresql_where=sa.text('exclusive_code IS NOT NULL'),
+        sqlite_where=sa.text('exclusive_code IS NOT NULL'),
+    )
+    op.drop_index(op.f('ix_exclusive_codes_user_id'), table_name='exclusive_codes')
+    op.drop_index(op.f('ix_exclusive_codes_expires_at'), table_name='exclusive_codes')
+    op.drop_table('exclusive_codes')
@@ -0,0 +1,59 @@
+"""make lower(email) unique
+
+Revision ID: e3f1a9c72d64
+Revises: a7c2e4f19b58
+Create Date: 2025-04-09 09:00:00.000000
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3f1a9c72d64'
+down_revision: Union[str, None] = 'a7c2e4f19b58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+
+def parked_email(user_id: str, email: str) -> str:
+    # Still unique, since it carries the id, and no longer matches the address
+    local, _, domain = email.partition('@')
+    return f"{local}+duplicate-{user_id}@{domain}"
+
+
+def upgrade() -> None:
+    # Emails used to be compared exactly, so one address can be on several
+    # rows in different cases. Keep one per address: the row stored in
+    # lower case if there is one, else the oldest. The others are
+    # deactivated and their email parked, for an operator to merge or
+    # delete; nothing is removed here.
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        'SELECT id, email, created_at FROM users WHERE lower(email) IN '
+        '(SELECT lower(email) FROM users GROUP BY lower(email) HAVING count(*) > 1)'
+    )).fetchall()
+    groups = {}
+    for row in rows:
+        groups.setdefault(row.email.lower(), []).append(row)
+    for address, group in groups.items():
+        group.sort(key=lambda row: (row.email != address, row.created_at is None, row.created_at, row.id))
+        for row in group[1:]:
+            bind.execute(
+                sa.text('UPDATE users SET email = :email, is_active = :inactive WHERE id = :id'),
+                {'email': parked_email(row.id, row.email), 'inactive': False, 'id': row.id},
+            )
+            logger.warning(f"Deactivated user {row.id}: {row.email} duplicates user {group[0].id}")
+
+    op.drop_index('ix_users_email_lower', table_name='users')
+    op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email)')], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_email_lower', table_name='users')
+    op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email)')])
@@ -0,0 +1,44 @@
+"""add campaign jobs
+
+Revision ID: b94d6e2f0c18
+Revises: e3f1a9c72d64
+Create Date: 2025-04-10 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b94d6e2f0c18'
+down_revision: Union[str, None] = 'e3f1a9c72d64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'campaign_jobs',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('requested', sa.Integer(), nullable=True),
+        sa.Column('matched', sa.Integer(), nullable=False),
+        sa.Column('not_found', sa.Integer(), nullable=False),
+        sa.Column('codes_issued', sa.Integer(), nullable=False),
+        sa.Column('queued', sa.Integer(), nullable=False),
+        sa.Column('sent', sa.Integer(), nullable=False),
+        sa.Column('failed', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_campaign_jobs_finished_at'), 'campaign_jobs', ['finished_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_campaign_jobs_finished_at'), table_name='campaign_jobs')
+    op.drop_table('campaign_jobs')
@@ -1,19 +1,25 @@
-from fastapi import Depends, HTTPException, status
+import hmac
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-import jwt
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from jwt.exceptions import PyJWTError
-from typing import Generator
 
-from app.database import get_db
+from app.config import ADMIN_API_KEY
+from app.database import get_async_db
+from app.core.cache import user_cache
+from app.core.security import decode_access_token, is_token_version_current
 from app.models.user import User
-from app.config import SECRET_KEY, ALGORITHM
+from app.services.revocation import revocation_list
 
 # OAuth2 scheme for JWT token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
-def get_current_user(
-    db: Session = Depends(get_db),
+async def get_current_user(
+    db: AsyncSession = Depends(get_async_db),
     token: str = Depends(oauth2_scheme)
 ) -> User:
     """
@@ -24,26 +30,106 @@ def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
     try:
         # Decode the JWT token
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(token)
         user_id: str = payload.get("sub")
-        if user_id is None:
+        if user_id is None or payload.get("typ") == "refresh":
             raise credentials_exception
     except PyJWTError:
         raise credentials_exception
-        
-    # Get user from database
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
+
+    # Answered from the Bloom filter unless the token may have been revoked
+    jti = payload.get("jti")
+    if jti and await revocation_list.is_revoked(db, jti):
         raise credentials_exception
-    
+
+    # Get user from the cache, falling back to the database
+    user = user_cache.get(user_id)
+    if user is None:
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
+        if user is None:
+            raise credentials_exception
+
+        # Cache a detached snapshot; writers reload the row in their own session
+        db.expunge(user)
+        user_cache.set(user_id, user)
+
     # Check if user is active
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Inactive user"
         )
-    
-    return user
\ No newline at end of file
+
+    return user
+
+@dataclass(frozen=True)
+class TokenClaims:
+    user_id: str
+    version: int
+    is_active: bool
+    exclusive_access: bool
+
+async def get_current_claims(
+    db: AsyncSession = Depends(get_async_db),
+    token: str = Depends(oauth2_scheme)
+) -> TokenClaims:
+    """
+    Authorize from the access token alone. The database is only queried
+    for tokens the revocation filter flags. Use get_current_user instead
+    when the endpoint needs the user's profile.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    try:
+        payload = decode_access_token(token)
+    except PyJWTError:
+        raise credentials_exception
+
+    user_id = payload.get("sub")
+    version = payload.get("ver")
+    # Tokens issued before claims were embedded carry no version
+    if user_id is None or version is None or payload.get("typ") != "access":
+        raise credentials_exception
+
+    jti = payload.get("jti")
+    if jti is None or await revocation_list.is_revoked(db, jti):
+        raise credentials_exception
+
+    # The claims changed since this token was issued
+    if not is_token_version_current(user_id, version):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token is stale, please refresh it",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    if not payload.get("is_active"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Inactive user"
+        )
+
+    return TokenClaims(
+        user_id=user_id,
+        version=version,
+        is_active=True,
+        exclusive_access=bool(payload.get("exclusive_access")),
+    )
+
+def require_admin_key(x_admin_key: Optional[str] = Header(None)) -> None:
+    """
+    Admin routes are for operators, not users; without ADMIN_API_KEY they
+    don't exist as far as callers can tell
+    """
+    if not ADMIN_API_KEY:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_admin_key or not hmac.compare_digest(x_admin_key.encode(), ADMIN_API_KEY.encode()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin key")
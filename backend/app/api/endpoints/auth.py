@@ -1,18 +1,34 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Form
-from sqlalchemy.orm import Session
-from typing import Any, Dict
-from jose import jwt, JWTError
-from datetime import datetime
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, Optional
+import math
+from jwt.exceptions import ExpiredSignatureError, PyJWTError
 
-from app.api.deps import get_current_user
-from app.core.security import get_password_hash, verify_password, create_access_token
+from app.api.deps import get_current_user, oauth2_scheme
+from app.api.responses import token_response
+from app.core.cache import user_cache
+from app.core.rate_limit import check_auth_rate_limit
+from app.core.security import (
+    get_password_hash_async,
+    verify_and_update_password_async,
+    create_access_token,
+    create_refresh_token,
+    access_token_claims,
+    record_token_version,
+    decode_access_token
+)
 from app.core.oauth import (
     get_google_auth_url, 
     exchange_google_code, 
     get_apple_auth_url,
     parse_apple_id_token
 )
-from app.services.email import generate_exclusive_code, send_exclusive_code
+from app.services.email import send_exclusive_code
+from app.services.exclusive_codes import issue_code, redeem_code
+from app.services.revocation import revocation_list
 from app.models.user import User
 from app.schemas.auth import (
     UserCreate, 
@@ -20,21 +36,73 @@ from app.schemas.auth import (
     Token, 
     ExclusiveCodeRequest, 
     ExclusiveCodeResponse,
+    RefreshRequest,
+    LogoutRequest,
+    RevokeRequest,
     UserResponse
 )
-from app.database import get_db
+from app.database import get_async_db
 
 router = APIRouter()
 
+# Refresh tokens may also be sent as a bearer token
+optional_bearer = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
+
+def issue_tokens(user: User) -> Dict[str, Any]:
+    """
+    Build the Token response for a user: a short-lived access token with
+    the user's claims and a refresh token to renew it
+    """
+    return {
+        "access_token": create_access_token(data=access_token_claims(user)),
+        "refresh_token": create_refresh_token(user.id),
+        "token_type": "bearer",
+        "user": user
+    }
+
+def enforce_auth_rate_limit(request: Request, email: str) -> None:
+    """
+    Reject throttled credential attempts before any hashing or DB work.
+    Behind a load balancer request.client is only the real client when
+    the proxy is listed in FORWARDED_ALLOW_IPS.
+    """
+    client_ip = request.client.host if request.client else "unknown"
+    retry_after = check_auth_rate_limit(client_ip, email)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many attempts, please try again later",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+async def link_provider_account(db: AsyncSession, user: User, provider: str, provider_user_id: str) -> None:
+    """
+    Record a provider sign-in on an existing user. Linking a new provider
+    account, or verifying the email through it, ends sessions issued
+    before it; a returning sign-in with the same account changes nothing.
+    """
+    if (user.provider, user.provider_user_id, user.is_verified) == (provider, provider_user_id, True):
+        return
+    user.provider = provider
+    user.provider_user_id = provider_user_id
+    user.is_verified = True
+    user.token_version += 1
+    await db.commit()
+    user_cache.invalidate(user.id)
+    record_token_version(user.id, user.token_version)
+
 @router.post("/signup", response_model=Token, status_code=status.HTTP_201_CREATED)
-def signup(user_create: UserCreate, db: Session = Depends(get_db)):
+async def signup(user_create: UserCreate, request: Request, db: AsyncSession = Depends(get_async_db)):
+    enforce_auth_rate_limit(request, user_create.email)
+    
     # Check if user exists
-    existing_user = db.query(User).filter(User.email == user_create.email).first()
+    result = await db.execute(select(User).where(func.lower(User.email) == user_create.email.lower()))
+    existing_user = result.scalar_one_or_none()
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create new user
-    hashed_password = get_password_hash(user_create.password)
+    hashed_password = await get_password_hash_async(user_create.password)
     
     # Create user object but don't save confirmPassword
     new_user = User(
@@ -45,56 +113,62 @@ def signup(user_create: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    
-    # Create access token
-    access_token = create_access_token(data={"sub": new_user.id})
+    try:
+        await db.commit()
+    except IntegrityError:
+        # A concurrent signup took the address, in any case, since the check
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Email already registered")
+    await db.refresh(new_user)
     
-    # Return token with user data
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "user": new_user
-    }
+    # Return tokens with user data
+    return token_response(issue_tokens(new_user), status.HTTP_201_CREATED)
 
 @router.post("/login", response_model=Token)
-async def login(form_data: UserLogin, db: Session = Depends(get_db)) -> Any:
+async def login(form_data: UserLogin, request: Request, db: AsyncSession = Depends(get_async_db)) -> Any:
     """
     Login for existing users
     """
+    enforce_auth_rate_limit(request, form_data.email)
+    
     # Find user by email
-    user = db.query(User).filter(User.email == form_data.email).first()
+    result = await db.execute(select(User).where(func.lower(User.email) == form_data.email.lower()))
+    user = result.scalar_one_or_none()
     
     # Check if user exists and password is correct
-    if not user or not verify_password(form_data.password, user.hashed_password or ""):
+    if user:
+        password_ok, new_hash = await verify_and_update_password_async(form_data.password, user.hashed_password or "")
+    if not user or not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Migrate the stored hash to the current scheme and cost settings
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+        user_cache.invalidate(user.id)
+    
     # Check exclusive code if provided
-    if form_data.exclusive_code and user.exclusive_code == form_data.exclusive_code:
+    if form_data.exclusive_code and await redeem_code(db, user.id, form_data.exclusive_code):
         user.exclusive_access = True
-        db.commit()
+        user.token_version += 1
+        await db.commit()
+        user_cache.invalidate(user.id)
+        record_token_version(user.id, user.token_version)
     
-    # Generate access token
-    access_token = create_access_token(data={"sub": user.id})
-    
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "user": user
-    }
+    return token_response(issue_tokens(user))
 
 @router.post("/request-code", response_model=ExclusiveCodeResponse)
-async def request_exclusive_code(request: ExclusiveCodeRequest, db: Session = Depends(get_db)) -> Any:
+async def request_exclusive_code(request: ExclusiveCodeRequest, db: AsyncSession = Depends(get_async_db)) -> Any:
     """
     Request an exclusive access code
     """
     # Find user by email
-    user = db.query(User).filter(User.email == request.email).first()
+    result = await db.execute(select(User).where(func.lower(User.email) == request.email.lower()))
+    user = result.scalar_one_or_none()
     
     if not user:
         raise HTTPException(
@@ -102,12 +176,10 @@ async def request_exclusive_code(request: ExclusiveCodeRequest, db: Session = De
             detail="User not found"
         )
     
-    # Generate and store a new exclusive code
-    exclusive_code = generate_exclusive_code()
-    user.exclusive_code = exclusive_code
-    db.commit()
+    # Generate and store a new exclusive code; only its hash is kept
+    exclusive_code = await issue_code(db, user.id)
     
-    # Send the code via email
+    # Queue the code for delivery; the outbox sends it in the background
     email_sent = await send_exclusive_code(user.email, exclusive_code)
     
     return {
@@ -123,10 +195,10 @@ async def google_login() -> Any:
     oauth_url = await get_google_auth_url()
     return {"authorization_url": oauth_url}
 
-@router.get("/google/callback")
+@router.get("/google/callback", response_model=Token)
 async def google_callback(
     code: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Handle Google OAuth callback
@@ -135,15 +207,19 @@ async def google_callback(
         # Exchange code for user info
         user_data = await exchange_google_code(code)
         
-        # Check if user exists in database
-        user = db.query(User).filter(User.email == user_data["email"]).first()
+        # Returning users are found by their Google account id
+        result = await db.execute(select(User).where(
+            User.provider == user_data["provider"],
+            User.provider_user_id == user_data["provider_user_id"]
+        ))
+        user = result.scalar_one_or_none()
+        if user is None:
+            # First Google sign-in: link to an existing account with the same email
+            result = await db.execute(select(User).where(func.lower(User.email) == user_data["email"].lower()))
+            user = result.scalar_one_or_none()
         
         if user:
-            # Update existing user
-            user.provider = user_data["provider"]
-            user.provider_user_id = user_data["provider_user_id"]
-            user.is_verified = True
-            db.commit()
+            await link_provider_account(db, user, user_data["provider"], user_data["provider_user_id"])
         else:
             # Create new user
             new_user = User(
@@ -156,15 +232,12 @@ async def google_callback(
                 hashed_password=""  # No password for OAuth users
             )
             db.add(new_user)
-            db.commit()
-            db.refresh(new_user)
+            await db.commit()
+            await db.refresh(new_user)
             user = new_user
         
-        # Create access token with user.id instead of user.email
-        access_token = create_access_token(data={"sub": user.id})
-        
-        # For testing: Return the token directly
-        return {"access_token": access_token, "token_type": "bearer", "user": user}
+        # For testing: Return the tokens directly
+        return token_response(issue_tokens(user))
         
     except Exception as e:
         raise HTTPException(
@@ -172,8 +245,8 @@ async def google_callback(
             detail=f"Failed to process Google callback: {str(e)}"
         )
 
-@router.post("/apple/callback")
-async def apple_callback(request: Request, db: Session = Depends(get_db)) -> Any:
+@router.post("/apple/callback", response_model=Token)
+async def apple_callback(request: Request, db: AsyncSession = Depends(get_async_db)) -> Any:
     """
     Handle Apple OAuth callback
     """
@@ -191,8 +264,16 @@ async def apple_callback(request: Request, db: Session = Depends(get_db)) -> Any
         # Parse the ID token to get user info
         user_info = await parse_apple_id_token(id_token)
         
-        # Check if user exists
-        user = db.query(User).filter(User.email == user_info["email"]).first()
+        # Returning users are found by their Apple account id
+        result = await db.execute(select(User).where(
+            User.provider == user_info["provider"],
+            User.provider_user_id == user_info["provider_user_id"]
+        ))
+        user = result.scalar_one_or_none()
+        if user is None:
+            # First Apple sign-in: link to an existing account with the same email
+            result = await db.execute(select(User).where(func.lower(User.email) == user_info["email"].lower()))
+            user = result.scalar_one_or_none()
         
         if not user:
             # Create new user
@@ -204,23 +285,12 @@ async def apple_callback(request: Request, db: Session = Depends(get_db)) -> Any
                 is_verified=user_info["is_verified"]
             )
             db.add(user)
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
         else:
-            # Update existing user with Apple info
-            user.provider = "apple"
-            user.provider_user_id = user_info["provider_user_id"]
-            user.is_verified = True
-            db.commit()
-        
-        # Generate access token
-        access_token = create_access_token(data={"sub": user.id})
+            await link_provider_account(db, user, user_info["provider"], user_info["provider_user_id"])
         
-        return {
-            "access_token": access_token,
-            "token_type": "bearer",
-            "user": user
-        }
+        return token_response(issue_tokens(user))
         
     except Exception as e:
         raise HTTPException(
@@ -228,6 +298,92 @@ async def apple_callback(request: Request, db: Session = Depends(get_db)) -> Any
             detail=f"Could not validate Apple credentials: {str(e)}"
         )
 
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(
+    body: Optional[RefreshRequest] = None,
+    bearer: Optional[str] = Depends(optional_bearer),
+    db: AsyncSession = Depends(get_async_db)
+) -> Any:
+    """
+    Exchange a refresh token, sent in the body or as a bearer token, for a
+    new access token carrying the user's current claims
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    token = body.refresh_token if body else bearer
+    if not token:
+        raise credentials_exception
+
+    try:
+        payload = decode_access_token(token)
+    except PyJWTError:
+        raise credentials_exception
+    if payload.get("typ") != "refresh" or payload.get("sub") is None:
+        raise credentials_exception
+    if await revocation_list.is_revoked(db, payload.get("jti", "")):
+        raise credentials_exception
+
+    # The one query of a session's read path: claims are rebuilt from the row
+    user = await db.get(User, payload["sub"])
+    if user is None:
+        raise credentials_exception
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Inactive user"
+        )
+
+    # Rotate: each refresh token is good for one exchange. Concurrent
+    # requests with the same token all get past the check above; only
+    # the one whose insert into revoked_tokens lands gets new tokens.
+    if not await revocation_list.revoke(db, payload):
+        raise credentials_exception
+    return token_response(issue_tokens(user))
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    body: Optional[LogoutRequest] = None,
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> None:
+    """
+    Revoke the bearer access token, and the session's refresh token if given
+    """
+    access = verify_token(token)
+    if access.get("typ") == "refresh":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    await revocation_list.revoke(db, access)
+
+    if body and body.refresh_token:
+        try:
+            refresh = decode_access_token(body.refresh_token)
+        except PyJWTError:
+            return
+        # Only the caller's own session can be ended this way
+        if refresh.get("sub") == access.get("sub"):
+            await revocation_list.revoke(db, refresh)
+
+@router.post("/revoke")
+async def revoke_token(body: RevokeRequest, db: AsyncSession = Depends(get_async_db)) -> Any:
+    """
+    Revoke an access or refresh token. Holding the token is the proof of
+    ownership; like RFC 7009, unusable tokens are answered the same way.
+    """
+    try:
+        payload = decode_access_token(body.token)
+    except PyJWTError:
+        return {"revoked": False}
+    # Revoking an already revoked token still leaves it revoked
+    await revocation_list.revoke(db, payload)
+    return {"revoked": bool(payload.get("jti"))}
+
 @router.get("/apple")
 async def apple_login() -> Any:
     """
@@ -238,22 +394,14 @@ async def apple_login() -> Any:
 
 def verify_token(token: str) -> Dict[str, Any]:
     try:
-        payload = jwt.decode(
-            token,
-            SECRET_KEY,
-            algorithms=[ALGORITHM]
+        return decode_access_token(token)
+    except ExpiredSignatureError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has expired",
+            headers={"WWW-Authenticate": "Bearer"},
         )
-        
-        # If token contains expiration claim, check it
-        if "exp" in payload and datetime.utcnow() >= datetime.fromtimestamp(payload["exp"]):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token has expired",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-            
-        return payload
-    except JWTError:
+    except PyJWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.schemas.campaign import CampaignJobResponse, ExclusiveCodeCampaignRequest
+from app.api.deps import require_admin_key
+from app.api.responses import json_response
+from app.services.campaigns import campaign_runner
+from app.services.email import smtp_configured
+
+router = APIRouter(dependencies=[Depends(require_admin_key)])
+
+@router.post(
+    "/exclusive-codes",
+    response_model=CampaignJobResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def start_exclusive_code_campaign(request: ExclusiveCodeCampaignRequest):
+    """
+    Issue exclusive codes to a list of users, or to every active user
+    matching a filter, and email them. Returns at once; poll the job for
+    progress.
+    """
+    if not smtp_configured():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Email is not configured"
+        )
+
+    filters = request.filter.model_dump() if request.filter is not None else None
+    job = await campaign_runner.submit(emails=request.emails, filters=filters)
+    return json_response(job, status.HTTP_202_ACCEPTED)
+
+@router.get("/{job_id}", response_model=CampaignJobResponse)
+async def get_campaign(job_id: str):
+    """
+    Progress of a campaign, from whichever worker it runs on
+    """
+    job = await campaign_runner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Campaign not found")
+    return json_response(job)
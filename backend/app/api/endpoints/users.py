@@ -1,43 +1,192 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import Any
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, AsyncIterator, Optional
+import orjson
 
 from app.models.user import User
-from app.schemas.auth import UserResponse
-from app.api.deps import get_current_user
-from app.database import get_db
+from app.schemas.auth import UserBatchRequest, UserBatchResponse, UserResponse
+from app.api.deps import TokenClaims, get_current_claims, get_current_user, require_admin_key
+from app.api.responses import json_response, user_payload, user_response
+from app.config import USER_LIST_MAX_LIMIT, USER_LIST_FETCH_SIZE, USER_BATCH_CHUNK_SIZE
+from app.core.cache import user_cache
+from app.core.security import record_token_version
+from app.services.exclusive_codes import redeem_code
+from app.core.pagination import InvalidCursor, decode_cursor, encode_cursor, escape_like
+from app.database import AsyncSessionLocal, get_async_db
 
 router = APIRouter()
 
+# Columns of UserResponse, selected directly so listing never builds ORM objects
+LIST_COLUMNS = (
+    User.id,
+    User.email,
+    User.name,
+    User.is_active,
+    User.is_verified,
+    User.created_at,
+    User.provider,
+    User.exclusive_access,
+)
+
+def _user_row_json(row) -> bytes:
+    # orjson writes created_at in the same ISO format as UserResponse
+    return orjson.dumps(dict(row._mapping))
+
+async def _stream_users(statement, limit: int, ndjson: bool) -> AsyncIterator[bytes]:
+    """
+    Stream one page, one fetch batch at a time. The statement asks for one
+    row more than the page so the next cursor is only given when a next
+    page exists.
+    """
+    count = 0
+    last = None
+    has_more = False
+    if not ndjson:
+        yield b'{"items":['
+
+    # Own session: the response body is produced after the endpoint returns
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(statement.execution_options(yield_per=USER_LIST_FETCH_SIZE))
+        async for partition in result.partitions():
+            lines = []
+            for row in partition:
+                if count == limit:
+                    has_more = True
+                    break
+                lines.append(_user_row_json(row))
+                last = row
+                count += 1
+            if lines:
+                if ndjson:
+                    yield b"\n".join(lines) + b"\n"
+                else:
+                    yield (b"," if count > len(lines) else b"") + b",".join(lines)
+            if has_more:
+                break
+        await result.close()
+
+    next_cursor = encode_cursor(last.created_at, last.id) if has_more else None
+    if ndjson:
+        # Final line carries the cursor for the next page
+        yield orjson.dumps({"next_cursor": next_cursor}) + b"\n"
+    else:
+        yield b"]," + orjson.dumps({"next_cursor": next_cursor})[1:]
+
+@router.get("", dependencies=[Depends(require_admin_key)])
+async def list_users(
+    limit: int = Query(100, ge=1, le=USER_LIST_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    provider: Optional[str] = None,
+    exclusive_access: Optional[bool] = None,
+    is_verified: Optional[bool] = None,
+    email_prefix: Optional[str] = Query(None, min_length=1),
+    format: str = Query("json", pattern="^(json|ndjson)$")
+) -> StreamingResponse:
+    """
+    List users oldest first, paged by an opaque cursor on (created_at, id).
+    Admin tooling only: needs X-Admin-Key, as every account's email is
+    listed.
+    Rows inserted while paging never shift later pages, so every user that
+    existed when paging started is returned exactly once.
+    """
+    statement = select(*LIST_COLUMNS).order_by(User.created_at, User.id).limit(limit + 1)
+
+    if cursor:
+        try:
+            created_at, user_id = decode_cursor(cursor)
+        except InvalidCursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        statement = statement.where(tuple_(User.created_at, User.id) > tuple_(created_at, user_id))
+    if provider is not None:
+        statement = statement.where(User.provider == provider)
+    if exclusive_access is not None:
+        statement = statement.where(User.exclusive_access == exclusive_access)
+    if is_verified is not None:
+        statement = statement.where(User.is_verified == is_verified)
+    if email_prefix:
+        statement = statement.where(
+            func.lower(User.email).like(escape_like(email_prefix.lower()) + "%", escape="\\")
+        )
+
+    ndjson = format == "ndjson"
+    return StreamingResponse(
+        _stream_users(statement, limit, ndjson),
+        media_type="application/x-ndjson" if ndjson else "application/json",
+    )
+
 @router.get("/me", response_model=UserResponse)
 async def read_current_user(current_user: User = Depends(get_current_user)) -> Any:
     """
     Get current user information
     """
-    return current_user
+    return user_response(current_user)
+
+@router.post("/batch", response_model=UserBatchResponse)
+async def read_users_by_ids(
+    request: UserBatchRequest,
+    db: AsyncSession = Depends(get_async_db),
+    claims: TokenClaims = Depends(get_current_claims)
+) -> Any:
+    """
+    Look up many users in one request, instead of one /{user_id} call per id
+    """
+    # Duplicates are looked up once; the response keeps first-seen order
+    ids = list(dict.fromkeys(request.ids))
+
+    found = {}
+    missing = []
+    for user_id in ids:
+        # Users authenticated recently are already in memory
+        cached = user_cache.get(user_id)
+        if cached is not None:
+            found[user_id] = cached
+        else:
+            missing.append(user_id)
+
+    for start in range(0, len(missing), USER_BATCH_CHUNK_SIZE):
+        chunk = missing[start:start + USER_BATCH_CHUNK_SIZE]
+        result = await db.execute(select(User).where(User.id.in_(chunk)))
+        for user in result.scalars():
+            found[user.id] = user
+
+    return json_response({
+        "users": {
+            user_id: user_payload(found[user_id]) if user_id in found else None
+            for user_id in ids
+        },
+        "not_found": [user_id for user_id in ids if user_id not in found],
+    })
 
 @router.get("/{user_id}", response_model=UserResponse)
 async def read_user_by_id(
     user_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    claims: TokenClaims = Depends(get_current_claims)
 ) -> Any:
     """
     Get a specific user by id
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = user_cache.get(user_id)
+    if user is None:
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
-    return user
+    return user_response(user)
 
 @router.put("/me/update-exclusive", response_model=UserResponse)
 async def update_exclusive_status(
     exclusive_code: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    claims: TokenClaims = Depends(get_current_claims),
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """
     Update user's exclusive access status using a code
@@ -48,14 +197,32 @@ async def update_exclusive_status(
             detail="Exclusive code is required"
         )
     
-    if current_user.exclusive_code != exclusive_code:
+    # The claims may predate a deactivation or deletion; a write checks the row
+    user = await db.get(User, claims.user_id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Inactive user"
+        )
+    
+    # Marks the code used; rolled back with the session if anything below fails
+    if not await redeem_code(db, claims.user_id, exclusive_code):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid exclusive code"
         )
     
-    current_user.exclusive_access = True
-    db.commit()
-    db.refresh(current_user)
+    user.exclusive_access = True
+    # Tokens claiming no exclusive access are stale now
+    user.token_version += 1
+    await db.commit()
+    await db.refresh(user)
+    user_cache.invalidate(user.id)
+    record_token_version(user.id, user.token_version)
     
-    return current_user
\ No newline at end of file
+    return user_response(user)
\ No newline at end of file
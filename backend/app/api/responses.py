@@ -0,0 +1,26 @@
+from typing import Any, Dict
+
+import orjson
+from fastapi import Response, status
+
+from app.schemas.auth import UserResponse
+
+# Read straight off the ORM object; the columns already have the types
+# UserResponse declares, so validating them again would only cost time
+USER_FIELDS = tuple(UserResponse.model_fields)
+
+def user_payload(user: Any) -> Dict[str, Any]:
+    return {field: getattr(user, field) for field in USER_FIELDS}
+
+def json_response(payload: Any, status_code: int = status.HTTP_200_OK) -> Response:
+    """
+    Serialize with orjson and skip the response_model pass; the route's
+    response_model still documents the shape
+    """
+    return Response(orjson.dumps(payload), status_code=status_code, media_type="application/json")
+
+def user_response(user: Any, status_code: int = status.HTTP_200_OK) -> Response:
+    return json_response(user_payload(user), status_code)
+
+def token_response(tokens: Dict[str, Any], status_code: int = status.HTTP_200_OK) -> Response:
+    return json_response({**tokens, "user": user_payload(tokens["user"])}, status_code)
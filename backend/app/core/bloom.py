@@ -0,0 +1,49 @@
+import hashlib
+import math
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings. Membership tests have no false
+    negatives; false positives stay near error_rate while no more than
+    capacity keys have been added. Keys can't be removed, only rebuilt.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        if capacity <= 0 or not 0 < error_rate < 1:
+            raise ValueError("Bloom filter needs a positive capacity and 0 < error_rate < 1")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        # Optimal sizing: m = -n ln p / (ln 2)^2 bits and k = m/n ln 2 hashes
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key: str):
+        # Double hashing: k indexes derived from the two halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        m = self.num_bits
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
+
+    def add(self, key: str) -> None:
+        bits = self._bits
+        for position in self._positions(key):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        for position in self._positions(key):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+    @property
+    def saturated(self) -> bool:
+        return self.count > self.capacity
@@ -0,0 +1,63 @@
+import math
+import re
+from typing import Iterable
+
+from starlette.middleware.cors import CORSMiddleware
+from starlette.types import ASGIApp
+
+from app.config import CORS_DECISION_CACHE_SIZE
+from app.core.cache import TTLCache
+
+# A wildcard stands for exactly one DNS label, e.g. https://*.app.github.dev
+_WILDCARD_LABEL = r"[A-Za-z0-9-]+"
+
+class OriginMatcher:
+    """
+    Allowed-origin check: exact origins live in a set and all wildcard
+    patterns are compiled into one regex. Regex decisions are memoised in
+    a bounded LRU so repeat origins cost a dict lookup.
+    """
+
+    def __init__(self, origins: Iterable[str], cache_size: int = CORS_DECISION_CACHE_SIZE):
+        self.exact = set()
+        patterns = []
+        for origin in origins:
+            origin = origin.strip().rstrip("/")
+            if not origin:
+                continue
+            if "*" in origin:
+                patterns.append(re.escape(origin).replace(r"\*", _WILDCARD_LABEL))
+            else:
+                self.exact.add(origin)
+
+        self.pattern = re.compile("|".join(patterns)) if patterns else None
+        self.decisions = TTLCache(cache_size, math.inf)
+
+    def is_allowed(self, origin: str) -> bool:
+        if origin in self.exact:
+            return True
+        if self.pattern is None:
+            return False
+
+        decision = self.decisions.get(origin)
+        if decision is None:
+            decision = self.pattern.fullmatch(origin) is not None
+            self.decisions.set(origin, decision)
+        return decision
+
+class OriginMatcherCORSMiddleware(CORSMiddleware):
+    """
+    Starlette's CORS middleware with wildcard origins (such as GitHub
+    Codespaces URLs) resolved by an OriginMatcher. Nothing is mutated per
+    request, so the allowed set cannot grow with traffic.
+    """
+
+    def __init__(self, app: ASGIApp, allow_origins: Iterable[str] = (), **kwargs):
+        allow_origins = list(allow_origins)
+        super().__init__(app, allow_origins=allow_origins, **kwargs)
+        self.matcher = OriginMatcher(allow_origins)
+
+    def is_allowed_origin(self, origin: str) -> bool:
+        if self.allow_all_origins:
+            return True
+        return self.matcher.is_allowed(origin)
@@ -0,0 +1,73 @@
+import time
+from typing import Dict, List
+
+from app.config import ARGON2_MEMORY_COST, ARGON2_PARALLELISM
+from app.core.security import build_crypt_context
+
+SAMPLE_PASSWORD = "Calibrati0n-password"
+
+def time_verify(context, samples: int) -> float:
+    """
+    Median seconds one verify takes with the given context on this host
+    """
+    hashed = context.hash(SAMPLE_PASSWORD)
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.verify(SAMPLE_PASSWORD, hashed)
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[len(timings) // 2]
+
+def calibrate_bcrypt(target_ms: float, samples: int = 3, min_rounds: int = 10, max_rounds: int = 16) -> Dict:
+    """
+    Pick the highest bcrypt cost whose verify time stays within target_ms.
+    Each extra round doubles the cost, so the search stops at the first miss.
+    """
+    results: List[Dict] = []
+    chosen = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        ms = time_verify(build_crypt_context(["bcrypt"], bcrypt_rounds=rounds), samples) * 1000
+        results.append({"rounds": rounds, "verify_ms": round(ms, 1)})
+        if ms > target_ms:
+            break
+        chosen = rounds
+    return {
+        "scheme": "bcrypt",
+        "measurements": results,
+        "settings": {"BCRYPT_ROUNDS": chosen},
+    }
+
+def calibrate_argon2(
+    target_ms: float,
+    samples: int = 3,
+    memory_cost: int = ARGON2_MEMORY_COST,
+    parallelism: int = ARGON2_PARALLELISM,
+    max_time_cost: int = 10
+) -> Dict:
+    """
+    With memory and parallelism fixed, pick the highest argon2 time cost
+    whose verify time stays within target_ms. Needs argon2-cffi.
+    """
+    results: List[Dict] = []
+    chosen = 1
+    for time_cost in range(1, max_time_cost + 1):
+        context = build_crypt_context(
+            ["argon2"],
+            argon2_time_cost=time_cost,
+            argon2_memory_cost=memory_cost,
+            argon2_parallelism=parallelism,
+        )
+        ms = time_verify(context, samples) * 1000
+        results.append({"time_cost": time_cost, "verify_ms": round(ms, 1)})
+        if ms > target_ms:
+            break
+        chosen = time_cost
+    return {
+        "scheme": "argon2",
+        "measurements": results,
+        "settings": {
+            "ARGON2_TIME_COST": chosen,
+            "ARGON2_MEMORY_COST": memory_cost,
+            "ARGON2_PARALLELISM": parallelism,
+        },
+    }
@@ -0,0 +1,58 @@
+import httpx
+import time
+from typing import Optional
+
+from app.config import (
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY_SECONDS,
+    HTTP_TIMEOUT_SECONDS,
+    HTTP_CONNECT_TIMEOUT_SECONDS,
+    HTTP2_ENABLED
+)
+from app.core.metrics import outbound_http_duration
+
+# Application-wide client, opened and closed by the app lifespan
+_client: Optional[httpx.AsyncClient] = None
+
+async def _start_timer(request: httpx.Request) -> None:
+    request.extensions["metrics_start"] = time.perf_counter()
+
+async def _record_timing(response: httpx.Response) -> None:
+    # Time to response headers; bodies from providers are small
+    start = response.request.extensions.get("metrics_start")
+    if start is not None:
+        outbound_http_duration.observe(time.perf_counter() - start, (response.request.url.host,))
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Build a pooled client that keeps provider connections alive between calls
+    """
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(HTTP_TIMEOUT_SECONDS, connect=HTTP_CONNECT_TIMEOUT_SECONDS),
+        http2=HTTP2_ENABLED,
+        event_hooks={"request": [_start_timer], "response": [_record_timing]},
+    )
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the shared client, creating it on first use outside the lifespan
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_http_client()
+    return _client
+
+async def start_http_client() -> None:
+    get_http_client()
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
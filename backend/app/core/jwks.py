@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+
+import jwt
+
+from app.config import (
+    APPLE_JWKS_URL,
+    APPLE_JWKS_TTL_SECONDS,
+    APPLE_JWKS_MIN_REFRESH_SECONDS
+)
+from app.core.http import get_http_client
+
+logger = logging.getLogger(__name__)
+
+class JWKSCache:
+    """
+    Signing keys from a JWKS endpoint, indexed by kid.
+
+    Keys are refreshed in the background every ttl seconds. A token with an
+    unknown kid forces one refetch (at most every min_refresh_seconds), and
+    concurrent callers share that single in-flight fetch.
+    """
+
+    def __init__(self, url: str, ttl: float, min_refresh_seconds: float):
+        self.url = url
+        self.ttl = ttl
+        self.min_refresh_seconds = min_refresh_seconds
+        self.fetch_count = 0
+        self._keys: Dict[str, jwt.PyJWK] = {}
+        self._fetched_at = 0.0
+        self._inflight: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def kids(self) -> List[str]:
+        return list(self._keys)
+
+    async def _fetch(self) -> None:
+        response = await get_http_client().get(self.url)
+        response.raise_for_status()
+
+        keys = {}
+        for data in response.json().get("keys", []):
+            kid = data.get("kid")
+            if not kid:
+                continue
+            try:
+                keys[kid] = jwt.PyJWK(data)
+            except jwt.PyJWTError as e:
+                logger.warning(f"Skipping unusable JWKS key {kid}: {str(e)}")
+
+        self._keys = keys
+        self._fetched_at = time.monotonic()
+        self.fetch_count += 1
+
+    async def refresh(self) -> None:
+        """
+        Refetch the key set; concurrent callers wait on the same request
+        """
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._fetch())
+            self._inflight.add_done_callback(self._clear_inflight)
+        # Shield so one cancelled caller does not cancel the fetch for everyone
+        await asyncio.shield(self._inflight)
+
+    def _clear_inflight(self, future: asyncio.Future) -> None:
+        self._inflight = None
+
+    async def get_signing_key(self, kid: Optional[str]) -> jwt.PyJWK:
+        if not kid:
+            raise ValueError("Token header has no kid")
+
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+
+        # Unknown kid: the provider may have rotated keys since the last fetch
+        if not self._keys or time.monotonic() - self._fetched_at >= self.min_refresh_seconds:
+            await self.refresh()
+            key = self._keys.get(kid)
+
+        if key is None:
+            raise ValueError(f"Unknown signing key id: {kid}")
+        return key
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+                delay = self.ttl
+            except Exception as e:
+                logger.error(f"Failed to refresh JWKS from {self.url}: {str(e)}")
+                delay = min(self.ttl, 60)
+            await asyncio.sleep(delay)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop(), name="jwks-refresh")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+apple_jwks = JWKSCache(APPLE_JWKS_URL, APPLE_JWKS_TTL_SECONDS, APPLE_JWKS_MIN_REFRESH_SECONDS)
@@ -0,0 +1,116 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Mapping, Optional
+
+from app.config import LOG_LEVEL, LOG_SAMPLE_RATES, LOG_HEADER_ALLOWLIST
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+class JSONFormatter(logging.Formatter):
+    """
+    One JSON object per line. Values passed via `extra` become top-level keys.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of DEBUG/INFO records per logger (longest dotted
+    prefix wins). Warnings and errors are never sampled away.
+    """
+
+    def __init__(self, rates: Mapping[str, float]):
+        super().__init__()
+        self.rates = dict(rates)
+        self._resolved: Dict[str, Optional[float]] = {}
+
+    def _rate_for(self, name: str) -> Optional[float]:
+        if name not in self._resolved:
+            rate = None
+            probe = name
+            while probe:
+                if probe in self.rates:
+                    rate = self.rates[probe]
+                    break
+                probe = probe.rpartition(".")[0]
+            self._resolved[name] = rate
+        return self._resolved[name]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate_for(record.name)
+        return rate is None or random.random() < rate
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that only merges the message arguments on the calling
+    thread; JSON encoding and traceback formatting happen on the listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def setup_logging(level: str = LOG_LEVEL, sample_rates: Mapping[str, float] = LOG_SAMPLE_RATES) -> None:
+    """
+    Route all logging through a queue drained by a background thread, so
+    log I/O never runs on the event loop. Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sample_rates))
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JSONFormatter())
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+def stop_logging() -> None:
+    """
+    Flush queued records and stop the listener thread
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def allowed_headers(headers: Mapping[str, str], allowlist: Iterable[str] = LOG_HEADER_ALLOWLIST) -> Dict[str, str]:
+    """
+    Only the configured headers, so credentials and cookies never reach the logs
+    """
+    return {name: headers[name] for name in allowlist if name in headers}
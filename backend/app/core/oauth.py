@@ -1,4 +1,3 @@
-import httpx
 from typing import Dict, Any
 import uuid
 import jwt
@@ -8,12 +7,17 @@ from app.config import (
     GOOGLE_CLIENT_ID,
     GOOGLE_CLIENT_SECRET,
     GOOGLE_REDIRECT_URI,
+    GOOGLE_TOKEN_URL,
+    GOOGLE_USERINFO_URL,
     APPLE_CLIENT_ID,
     APPLE_TEAM_ID,
     APPLE_KEY_ID,
     APPLE_PRIVATE_KEY,
-    APPLE_REDIRECT_URI
+    APPLE_REDIRECT_URI,
+    APPLE_ISSUER
 )
+from app.core.http import get_http_client
+from app.core.jwks import apple_jwks
 
 async def get_google_auth_url() -> str:
     """
@@ -37,7 +41,6 @@ async def exchange_google_code(code: str) -> Dict[str, Any]:
     Exchange Google auth code for tokens and user info
     """
     # Exchange code for token
-    token_url = "https://oauth2.googleapis.com/token"
     data = {
         "client_id": GOOGLE_CLIENT_ID,
         "client_secret": GOOGLE_CLIENT_SECRET,
@@ -46,30 +49,32 @@ async def exchange_google_code(code: str) -> Dict[str, Any]:
         "redirect_uri": GOOGLE_REDIRECT_URI
     }
     
-    async with httpx.AsyncClient() as client:
-        # Get tokens
-        token_response = await client.post(token_url, data=data)
-        token_data = token_response.json()
-        
-        if token_response.status_code != 200:
-            raise ValueError(f"Failed to exchange Google code: {token_data.get('error_description', 'Unknown error')}")
-        
-        # Get user info with the access token
-        access_token = token_data.get("access_token")
-        headers = {"Authorization": f"Bearer {access_token}"}
-        user_info_response = await client.get("https://www.googleapis.com/oauth2/v1/userinfo", headers=headers)
-        user_info = user_info_response.json()
-        
-        if user_info_response.status_code != 200:
-            raise ValueError("Failed to get user info from Google")
-        
-        return {
-            "provider": "google",
-            "provider_user_id": user_info.get("id"),
-            "email": user_info.get("email"),
-            "name": user_info.get("name") or user_info.get("email").split('@')[0],
-            "is_verified": True
-        }
+    # Both calls reuse pooled keep-alive connections from the shared client
+    client = get_http_client()
+    
+    # Get tokens
+    token_response = await client.post(GOOGLE_TOKEN_URL, data=data)
+    token_data = token_response.json()
+    
+    if token_response.status_code != 200:
+        raise ValueError(f"Failed to exchange Google code: {token_data.get('error_description', 'Unknown error')}")
+    
+    # Get user info with the access token
+    access_token = token_data.get("access_token")
+    headers = {"Authorization": f"Bearer {access_token}"}
+    user_info_response = await client.get(GOOGLE_USERINFO_URL, headers=headers)
+    user_info = user_info_response.json()
+    
+    if user_info_response.status_code != 200:
+        raise ValueError("Failed to get user info from Google")
+    
+    return {
+        "provider": "google",
+        "provider_user_id": user_info.get("id"),
+        "email": user_info.get("email"),
+        "name": user_info.get("name") or user_info.get("email").split('@')[0],
+        "is_verified": True
+    }
 
 async def get_apple_auth_url() -> str:
     """
@@ -90,12 +95,18 @@ async def get_apple_auth_url() -> str:
 
 async def parse_apple_id_token(id_token: str) -> Dict[str, Any]:
     """
-    Parse Apple ID token to get user info
+    Verify the Apple ID token against Apple's cached signing keys and get user info
     """
-    # In production, verify the signature
-    # For this example, we'll just decode without verification
     try:
-        payload = jwt.decode(id_token, options={"verify_signature": False})
+        header = jwt.get_unverified_header(id_token)
+        signing_key = await apple_jwks.get_signing_key(header.get("kid"))
+        payload = jwt.decode(
+            id_token,
+            signing_key.key,
+            algorithms=["RS256"],
+            audience=APPLE_CLIENT_ID,
+            issuer=APPLE_ISSUER
+        )
         
         # Extract user info
         user_id = payload.get("sub")
@@ -0,0 +1,30 @@
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+class InvalidCursor(ValueError):
+    """
+    Raised when a pagination cursor can't be decoded
+    """
+
+def encode_cursor(created_at: datetime, user_id: str) -> str:
+    """
+    Opaque cursor pointing just past the (created_at, id) of a row
+    """
+    raw = json.dumps([created_at.isoformat(), user_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, user_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), str(user_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(str(e)) from e
+
+def escape_like(value: str, escape: str = "\\") -> str:
+    """
+    Escape LIKE wildcards so user input only matches literally
+    """
+    return value.replace(escape, escape * 2).replace("%", escape + "%").replace("_", escape + "_")
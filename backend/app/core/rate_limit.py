@@ -0,0 +1,94 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Callable, Tuple
+
+from app.config import (
+    RATE_LIMIT_ENABLED,
+    RATE_LIMIT_IP_BURST,
+    RATE_LIMIT_IP_PER_MINUTE,
+    RATE_LIMIT_EMAIL_BURST,
+    RATE_LIMIT_EMAIL_PER_MINUTE,
+    RATE_LIMIT_MAX_KEYS
+)
+
+class TokenBucketLimiter:
+    """
+    Token buckets keyed by an arbitrary string, stored as (tokens, updated_at)
+    tuples in order of last update. Buckets that have refilled completely
+    carry no state worth keeping, so a periodic sweep drops them from the
+    old end; a new key arriving while max_keys buckets are held evicts the
+    least recently hit one. Every hit is O(1), however many keys a client
+    rotates through.
+    """
+
+    def __init__(
+        self,
+        burst: int,
+        per_minute: float,
+        max_keys: int,
+        sweep_interval: float = 60.0,
+        timer: Callable[[], float] = time.monotonic
+    ):
+        self.burst = burst
+        self.rate = per_minute / 60.0
+        self.max_keys = max_keys
+        self.sweep_interval = sweep_interval
+        self.timer = timer
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._next_sweep = timer() + sweep_interval
+
+    def hit(self, key: str) -> float:
+        """
+        Take one token for key. Returns 0 when allowed, otherwise the
+        number of seconds until a token is available.
+        """
+        now = self.timer()
+        if now >= self._next_sweep:
+            self.sweep(now)
+
+        # Popped and reinserted, so the dict stays ordered by updated_at
+        bucket = self._buckets.pop(key, None)
+        if bucket is None:
+            if len(self._buckets) >= self.max_keys:
+                self._buckets.popitem(last=False)
+            bucket = (self.burst, now)
+        tokens, updated_at = bucket
+        tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+        if tokens < 1:
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / self.rate if self.rate > 0 else math.inf
+
+        self._buckets[key] = (tokens - 1, now)
+        return 0.0
+
+    def sweep(self, now: float) -> None:
+        """
+        Drop buckets that have refilled; only those are visited, since
+        they are all at the old end
+        """
+        full_after = self.burst / self.rate if self.rate > 0 else math.inf
+        while self._buckets:
+            _, updated_at = next(iter(self._buckets.values()))
+            if now - updated_at < full_after:
+                break
+            self._buckets.popitem(last=False)
+        self._next_sweep = now + self.sweep_interval
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+ip_limiter = TokenBucketLimiter(RATE_LIMIT_IP_BURST, RATE_LIMIT_IP_PER_MINUTE, RATE_LIMIT_MAX_KEYS)
+email_limiter = TokenBucketLimiter(RATE_LIMIT_EMAIL_BURST, RATE_LIMIT_EMAIL_PER_MINUTE, RATE_LIMIT_MAX_KEYS)
+
+def check_auth_rate_limit(client_ip: str, email: str) -> float:
+    """
+    Throttle credential attempts per client IP and per target email.
+    Returns 0 when the attempt may proceed, otherwise seconds to wait.
+    """
+    if not RATE_LIMIT_ENABLED:
+        return 0.0
+    retry_after = ip_limiter.hit(client_ip)
+    if retry_after:
+        return retry_after
+    return email_limiter.hit(email.lower())
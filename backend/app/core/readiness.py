@@ -0,0 +1,46 @@
+from typing import Iterable, Optional
+
+from starlette.responses import JSONResponse
+
+class Readiness:
+    """
+    Whether startup work (database, pools) has finished. Until it has,
+    API requests are answered with 503 instead of failing halfway through.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.reason: Optional[str] = "starting"
+
+    def set_ready(self) -> None:
+        self.ready = True
+        self.reason = None
+
+    def set_not_ready(self, reason: str) -> None:
+        self.ready = False
+        self.reason = reason
+
+readiness = Readiness()
+
+class ReadinessMiddleware:
+    """
+    ASGI middleware returning 503 for everything but the exempt paths
+    (liveness, readiness, metrics) while the app is not ready
+    """
+
+    def __init__(self, app, readiness: Readiness = readiness, exempt_paths: Iterable[str] = ("/", "/ready", "/metrics")):
+        self.app = app
+        self.readiness = readiness
+        self.exempt_paths = frozenset(exempt_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.readiness.ready or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        response = JSONResponse(
+            status_code=503,
+            content={"detail": "Service is starting, please retry"},
+            headers={"Retry-After": "1"},
+        )
+        await response(scope, receive, send)
@@ -1,12 +1,64 @@
+import asyncio
+import hashlib
+import time
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Callable, Dict, Optional, Tuple, Union
 
 from passlib.context import CryptContext
 import jwt
 
-from app.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.config import (
+    SECRET_KEY,
+    ALGORITHM,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    REFRESH_TOKEN_EXPIRE_DAYS,
+    TOKEN_VERSION_CACHE_MAX_SIZE,
+    PASSWORD_HASH_SCHEMES,
+    BCRYPT_ROUNDS,
+    ARGON2_TIME_COST,
+    ARGON2_MEMORY_COST,
+    ARGON2_PARALLELISM,
+    PASSWORD_HASH_BACKEND,
+    PASSWORD_HASH_WORKERS,
+    PASSWORD_HASH_MAX_QUEUE,
+    TOKEN_CACHE_TTL_SECONDS,
+    TOKEN_CACHE_NEGATIVE_TTL_SECONDS,
+    TOKEN_CACHE_MAX_SIZE,
+    TOKEN_CACHE_NEGATIVE_MAX_SIZE
+)
+from app.core.cache import TTLCache
+from app.core.metrics import password_hash_duration
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+def build_crypt_context(
+    schemes: list = PASSWORD_HASH_SCHEMES,
+    bcrypt_rounds: int = BCRYPT_ROUNDS,
+    argon2_time_cost: int = ARGON2_TIME_COST,
+    argon2_memory_cost: int = ARGON2_MEMORY_COST,
+    argon2_parallelism: int = ARGON2_PARALLELISM
+) -> CryptContext:
+    """
+    Build the password context. Hashes made with another scheme or with
+    different cost settings are reported by needs_update()
+    """
+    settings = {
+        # Pin the rounds so hashes made with any other cost get migrated
+        "bcrypt__default_rounds": bcrypt_rounds,
+        "bcrypt__min_rounds": bcrypt_rounds,
+        "bcrypt__max_rounds": bcrypt_rounds,
+    }
+    if "argon2" in schemes:
+        settings.update({
+            "argon2__time_cost": argon2_time_cost,
+            "argon2__memory_cost": argon2_memory_cost,
+            "argon2__parallelism": argon2_parallelism,
+            "argon2__min_rounds": argon2_time_cost,
+            "argon2__max_rounds": argon2_time_cost,
+        })
+    return CryptContext(schemes=schemes, deprecated="auto", **settings)
+
+pwd_context = build_crypt_context()
 
 # Password functions
 def get_password_hash(password: str) -> str:
@@ -15,6 +67,85 @@ def get_password_hash(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and, when the stored hash uses outdated settings,
+    also return a replacement hash made with the current ones
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+# Password hashing pool
+class PasswordHashQueueFull(Exception):
+    """
+    Raised when the hashing pool already has as much work as it accepts
+    """
+
+class PasswordHasher:
+    """
+    Runs bcrypt work on a bounded thread or process pool so a login
+    never stalls the event loop for the duration of a hash
+    """
+
+    def __init__(self, workers: int, backend: str = "thread", max_queue: int = 0):
+        if backend not in ("thread", "process"):
+            raise ValueError(f"Unknown password hash backend: {backend}")
+        self.workers = workers
+        self.backend = backend
+        self.max_queue = max_queue
+        self.pending = 0
+        self._executor: Optional[Executor] = None
+
+    @property
+    def capacity(self) -> int:
+        # Jobs running on a worker plus jobs waiting for one
+        return self.workers + self.max_queue
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.backend == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self.workers <= 0:
+            return func(*args)
+
+        # Shed load instead of letting the queue grow without bound
+        if self.pending >= self.capacity:
+            raise PasswordHashQueueFull()
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+password_hasher = PasswordHasher(
+    PASSWORD_HASH_WORKERS, PASSWORD_HASH_BACKEND, PASSWORD_HASH_MAX_QUEUE
+)
+
+async def get_password_hash_async(password: str) -> str:
+    with password_hash_duration.time(("hash",)):
+        return await password_hasher.run(get_password_hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    with password_hash_duration.time(("verify",)):
+        return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    with password_hash_duration.time(("verify",)):
+        return await password_hasher.run(verify_and_update_password, plain_password, hashed_password)
+
 # JWT token functions
 def create_access_token(data: dict, expires_delta: Union[timedelta, None] = None) -> str:
     to_encode = data.copy()
@@ -22,6 +153,85 @@ def create_access_token(data: dict, expires_delta: Union[timedelta, None] = None
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode.setdefault("typ", "access")
+    # Unique id, so the token can be revoked before it expires
+    to_encode.setdefault("jti", uuid.uuid4().hex)
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
\ No newline at end of file
+    return encoded_jwt
+
+def access_token_claims(user: Any) -> Dict[str, Any]:
+    """
+    Claims endpoints authorize from without loading the user. They are
+    only as fresh as the token, so every change to them bumps
+    user.token_version.
+    """
+    return {
+        "sub": user.id,
+        "ver": user.token_version or 0,
+        "is_active": bool(user.is_active),
+        "exclusive_access": bool(user.exclusive_access),
+    }
+
+def create_refresh_token(user_id: str, expires_delta: Union[timedelta, None] = None) -> str:
+    # Carries no claims; /api/auth/refresh reads them from the database
+    expire = datetime.utcnow() + (expires_delta or timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
+    return jwt.encode(
+        {"sub": user_id, "typ": "refresh", "jti": uuid.uuid4().hex, "exp": expire},
+        SECRET_KEY,
+        algorithm=ALGORITHM
+    )
+
+# Latest token_version of users whose claims changed in this process. An
+# entry only has to outlive the access tokens it makes stale.
+token_versions = TTLCache(TOKEN_VERSION_CACHE_MAX_SIZE, ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+def record_token_version(user_id: str, version: int) -> None:
+    """
+    Call after committing a token_version bump so tokens carrying an
+    older version are rejected here before they expire
+    """
+    token_versions.set(user_id, version)
+
+def is_token_version_current(user_id: str, version: int) -> bool:
+    latest = token_versions.get(user_id)
+    return latest is None or version >= latest
+
+# Verified token cache, keyed by token digest
+token_cache = TTLCache(TOKEN_CACHE_MAX_SIZE, TOKEN_CACHE_TTL_SECONDS)
+# Rejected tokens, kept apart so unique junk tokens only evict each other
+rejected_token_cache = TTLCache(TOKEN_CACHE_NEGATIVE_MAX_SIZE, TOKEN_CACHE_NEGATIVE_TTL_SECONDS)
+
+class _RejectedToken:
+    """
+    Negative cache entry; keeps the original error so it can be raised again
+    """
+    __slots__ = ("error_type", "message")
+
+    def __init__(self, error: jwt.PyJWTError):
+        self.error_type = type(error)
+        self.message = str(error)
+
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """
+    Verify a JWT and return its claims, reusing earlier verifications of
+    the same token. Raises jwt.PyJWTError for invalid tokens. The returned
+    dict is shared between requests and must not be modified.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    cached = token_cache.get(key)
+    if cached is not None:
+        return cached
+    rejected = rejected_token_cache.get(key)
+    if rejected is not None:
+        raise rejected.error_type(rejected.message)
+
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.PyJWTError as e:
+        rejected_token_cache.set(key, _RejectedToken(e))
+        raise
+
+    exp = payload.get("exp")
+    token_cache.set(key, payload, ttl=exp - time.time() if exp is not None else None)
+    return payload
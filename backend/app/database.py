@@ -1,17 +1,134 @@
-from sqlalchemy import create_engine
+import asyncio
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from typing import Any, AsyncGenerator, Dict
+
+from app.config import (
+    SQLALCHEMY_DATABASE_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    DB_STATEMENT_TIMEOUT_MS,
+    SQLITE_JOURNAL_MODE,
+    SQLITE_SYNCHRONOUS,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_CACHE_SIZE,
+    SQLITE_MMAP_SIZE,
+    DB_CREATE_ALL,
+    DB_POOL_WARMUP
+)
+from app.core.metrics import instrument_engine
+
+# Async drivers used for each sync dialect in DATABASE_URL
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+def get_async_database_url(url: str) -> str:
+    """
+    Translate the configured (sync) database URL to its async driver
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend: {backend}")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+# Pragmas run on every new SQLite connection. WAL lets readers carry on
+# while a signup or login commits; only journal_mode persists in the file.
+SQLITE_PRAGMAS = {
+    "journal_mode": SQLITE_JOURNAL_MODE,
+    "synchronous": SQLITE_SYNCHRONOUS,
+    "busy_timeout": SQLITE_BUSY_TIMEOUT_MS,
+    "cache_size": SQLITE_CACHE_SIZE,
+    "mmap_size": SQLITE_MMAP_SIZE,
+}
 
-from app.config import SQLALCHEMY_DATABASE_URL
+def is_sqlite_memory(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+
+def engine_options(url: str, is_async: bool = False) -> Dict[str, Any]:
+    """
+    Engine keyword arguments for the database backend in the URL
+    """
+    backend = make_url(url).get_backend_name()
+    options: Dict[str, Any] = {}
+    connect_args: Dict[str, Any] = {}
+
+    if backend == "sqlite":
+        if not is_async:
+            connect_args["check_same_thread"] = False
+        # In-memory databases live on one connection, so there is no pool to size
+        if is_sqlite_memory(url):
+            options["connect_args"] = connect_args
+            return options
+        # aiosqlite defaults to NullPool, which reopens the file (and reruns
+        # the pragmas) for every session
+        if is_async:
+            options["poolclass"] = AsyncAdaptedQueuePool
+    elif DB_STATEMENT_TIMEOUT_MS > 0:
+        if is_async:
+            connect_args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+        else:
+            connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+
+    options.update({
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        # A local SQLite file can't go away under us, so skip the extra round trip
+        "pool_pre_ping": DB_POOL_PRE_PING and backend != "sqlite",
+        "connect_args": connect_args,
+    })
+    return options
+
+def apply_sqlite_pragmas(engine: Engine, pragmas: Dict[str, Any] = SQLITE_PRAGMAS) -> None:
+    """
+    Run the given PRAGMA statements on every connection the engine opens
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
 
 # Create SQLAlchemy engine
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False} if SQLALCHEMY_DATABASE_URL.startswith("sqlite") else {}
-)
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options(SQLALCHEMY_DATABASE_URL))
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine used by the API endpoints
+ASYNC_DATABASE_URL = get_async_database_url(SQLALCHEMY_DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL, is_async=True))
+
+apply_sqlite_pragmas(engine)
+apply_sqlite_pragmas(async_engine.sync_engine)
+
+# Query count and latency metrics for both engines
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
+# Objects stay readable after commit so handlers can return them without a reload
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Create Base class
 Base = declarative_base()
 
@@ -21,4 +138,37 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Dependency to get an async DB session
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def init_database(create_all: bool = DB_CREATE_ALL, warmup: int = DB_POOL_WARMUP) -> None:
+    """
+    Create missing tables and open pooled connections before traffic
+    arrives. Raises if the database can't be reached.
+    """
+    if create_all:
+        async with async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    # Connections opened past the pool size would be discarded on return
+    pool_size = getattr(async_engine.pool, "size", None)
+    if callable(pool_size):
+        warmup = min(warmup, pool_size())
+    if warmup <= 0:
+        return
+
+    results = await asyncio.gather(*(async_engine.connect() for _ in range(warmup)), return_exceptions=True)
+    connections = [conn for conn in results if not isinstance(conn, BaseException)]
+    try:
+        for error in results:
+            if isinstance(error, BaseException):
+                raise error
+        await asyncio.gather(*(conn.execute(text("SELECT 1")) for conn in connections))
+    finally:
+        # Closing returns them to the pool, opened and ready
+        for conn in connections:
+            await conn.close()
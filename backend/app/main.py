@@ -1,52 +1,135 @@
-from fastapi import FastAPI, Request
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse
 import logging
 import re
+from sqlalchemy.exc import SQLAlchemyError
 
 # Make sure these modules exist and have the expected content
-from app.api.endpoints import auth, users
-from app.database import Base, engine
-from app.config import ALLOWED_ORIGINS, API_V1_STR
+from app.api.endpoints import auth, campaigns, users
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+from app.database import async_engine, init_database
+from app.config import (
+    ALLOWED_ORIGINS,
+    API_V1_STR,
+    APPLE_CLIENT_ID,
+    DB_STARTUP_RETRY_SECONDS,
+    DB_STARTUP_RETRY_MAX_SECONDS,
+    DB_STARTUP_WAIT_SECONDS
+)
+from app.core.security import password_hasher, token_cache, PasswordHashQueueFull
+from app.core.cache import user_cache
+from app.core.metrics import registry, Gauge, MetricsMiddleware
+from app.core.logging_config import setup_logging, allowed_headers
+from app.core.cors import OriginMatcherCORSMiddleware
+from app.core.http import start_http_client, close_http_client
+from app.core.jwks import apple_jwks
+from app.core.readiness import readiness, ReadinessMiddleware
+from app.services.email import campaign_outbox, email_outbox, smtp_configured
+from app.services.revocation import revocation_list
+from app.services.exclusive_codes import exclusive_code_purger
+from app.services.campaigns import campaign_runner
+
+# Set up logging: JSON lines written from a background thread
+setup_logging()
 logger = logging.getLogger(__name__)
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+async def initialize_database() -> None:
+    """
+    Initialize the database, retrying with backoff while it is unreachable,
+    then mark the app ready. Any other error is not retried; it ends the
+    task and is reported by report_database_init.
+    """
+    delay = DB_STARTUP_RETRY_SECONDS
+    while True:
+        try:
+            await init_database()
+        except (SQLAlchemyError, OSError) as e:
+            readiness.set_not_ready(f"database unavailable: {e.__class__.__name__}")
+            logger.warning(f"Database not ready, retrying in {delay:.1f}s: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, DB_STARTUP_RETRY_MAX_SECONDS)
+        else:
+            # Until its first load, the revocation filter defers to the table
+            revocation_list.start()
+            exclusive_code_purger.start()
+            readiness.set_ready()
+            logger.info("Database ready")
+            return
+
+def report_database_init(task: asyncio.Task) -> None:
+    """
+    Log the error that ended initialize_database, which nothing else awaits
+    once startup is over
+    """
+    if task.cancelled() or task.exception() is None:
+        return
+    error = task.exception()
+    readiness.set_not_ready(f"database initialization failed: {error.__class__.__name__}")
+    logger.error("Database initialization failed and will not be retried", exc_info=error)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await start_http_client()
+    if APPLE_CLIENT_ID:
+        apple_jwks.start()
+    if smtp_configured():
+        email_outbox.start()
+        campaign_outbox.start()
+
+    # A reachable database is ready before the first request; an unreachable
+    # one keeps being retried while API routes answer 503
+    db_init = asyncio.create_task(initialize_database())
+    db_init.add_done_callback(report_database_init)
+    await asyncio.wait({db_init}, timeout=DB_STARTUP_WAIT_SECONDS)
+    try:
+        if db_init.done() and not db_init.cancelled() and db_init.exception() is not None:
+            # Not retryable: fail startup rather than answer 503 forever
+            raise db_init.exception()
+        yield
+    finally:
+        readiness.set_not_ready("shutting down")
+        db_init.cancel()
+        await revocation_list.stop()
+        await exclusive_code_purger.stop()
+        # Campaigns first, so they stop feeding the outbox it drains
+        await campaign_runner.stop()
+        await campaign_outbox.stop()
+        await email_outbox.stop()
+        await apple_jwks.stop()
+        await close_http_client()
+        password_hasher.shutdown()
+        await async_engine.dispose()
 
 app = FastAPI(
     title="Ventry Auth API",
     description="API for authentication and user management",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
+@app.exception_handler(PasswordHashQueueFull)
+async def password_hash_queue_full_handler(request: Request, exc: PasswordHashQueueFull):
+    """
+    The hashing pool is saturated; ask the client to retry shortly
+    """
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server is busy, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
 # Log the CORS origins for debugging
 logger.info(f"Configuring CORS with allowed origins: {ALLOWED_ORIGINS}")
 
-# CORS configuration
-class GitHubCodespacesCORSMiddleware(CORSMiddleware):
-    async def process_request(self, request, call_next):
-        origin = request.headers.get("origin", "")
-        
-        # Log the origin for debugging
-        logger.info(f"Received request from origin: {origin}")
-        
-        # If it's a GitHub Codespaces URL, add it to allowed origins temporarily
-        if "app.github.dev" in origin and origin not in self.app.state.allowed_origins:
-            logger.info(f"Adding GitHub Codespaces origin to allowed: {origin}")
-            self.app.state.allowed_origins.append(origin)
-            self.allow_origins = self.app.state.allowed_origins
-        
-        return await super().process_request(request, call_next)
-
-# Store allowed origins in app state so we can modify it dynamically
-app.state.allowed_origins = ALLOWED_ORIGINS
-
-# Use custom CORS middleware
+# Innermost, so CORS headers are still added to 503s while starting
+app.add_middleware(ReadinessMiddleware, readiness=readiness)
+
+# CORS with wildcard support, e.g. for GitHub Codespaces origins
 app.add_middleware(
-    GitHubCodespacesCORSMiddleware,
+    OriginMatcherCORSMiddleware,
     allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
@@ -55,9 +138,24 @@ app.add_middleware(
     max_age=600,  # Cache preflight requests for 10 minutes
 )
 
+# Outermost middleware, so its timings cover CORS handling too
+app.add_middleware(MetricsMiddleware)
+
+# Metrics owned by other modules, read at scrape time
+registry.register(Gauge("user_cache_hits_total", "User cache hits", lambda: user_cache.hits, kind="counter"))
+registry.register(Gauge("user_cache_misses_total", "User cache misses", lambda: user_cache.misses, kind="counter"))
+registry.register(Gauge("token_cache_hits_total", "Verified token cache hits", lambda: token_cache.hits, kind="counter"))
+registry.register(Gauge("token_cache_misses_total", "Verified token cache misses", lambda: token_cache.misses, kind="counter"))
+registry.register(Gauge("password_hash_pending", "Password hashing jobs running or queued", lambda: password_hasher.pending))
+registry.register(Gauge("revoked_tokens_loaded", "Revoked token ids in the Bloom filter", lambda: revocation_list.size))
+registry.register(Gauge("revocation_db_checks_total", "Tokens the Bloom filter sent to the database", lambda: revocation_list.db_checks, kind="counter"))
+registry.register(Gauge("email_outbox_size", "Emails waiting in the outbox", lambda: email_outbox.size))
+registry.register(Gauge("campaign_outbox_size", "Campaign emails waiting in the outbox", lambda: campaign_outbox.size))
+
 # Include routers
 app.include_router(auth.router, prefix=f"{API_V1_STR}/auth", tags=["auth"])
 app.include_router(users.router, prefix=f"{API_V1_STR}/users", tags=["users"])
+app.include_router(campaigns.router, prefix=f"{API_V1_STR}/campaigns", tags=["campaigns"])
 
 # Enhanced health check endpoint to aid debugging
 @app.get("/", tags=["health"])
@@ -65,8 +163,11 @@ async def health_check(request: Request):
     """
     Health check endpoint with request details for debugging
     """
-    logger.info(f"Health check called from {request.client.host}")
-    logger.info(f"Request headers: {dict(request.headers)}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Health check", extra={
+            "client": request.client.host if request.client else None,
+            "headers": allowed_headers(request.headers),
+        })
     
     # Return useful information
     return {
@@ -74,5 +175,25 @@ async def health_check(request: Request):
         "message": "API is running",
         "cors_settings": {
             "allowed_origins": ALLOWED_ORIGINS,
-        }
-    }
\ No newline at end of file
+        },
+        "user_cache": user_cache.stats()
+    }
+
+@app.get("/ready", tags=["health"])
+async def readiness_check():
+    """
+    Readiness probe: 200 once startup has finished, 503 until then
+    """
+    if not readiness.ready:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "starting", "reason": readiness.reason},
+        )
+    return {"status": "ready"}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> PlainTextResponse:
+    """
+    Prometheus text exposition of the process metrics
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, String, DateTime, Integer, Text
+
+from app.database import Base
+
+class CampaignJob(Base):
+    __tablename__ = "campaign_jobs"
+
+    id = Column(String, primary_key=True)
+    # pending -> running -> sending -> completed, or failed
+    status = Column(String, nullable=False)
+    # Number of emails given; null for a filter campaign
+    requested = Column(Integer, nullable=True)
+    matched = Column(Integer, nullable=False, default=0)
+    not_found = Column(Integer, nullable=False, default=0)
+    codes_issued = Column(Integer, nullable=False, default=0)
+    queued = Column(Integer, nullable=False, default=0)
+    sent = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False)
+    # Heartbeat: the worker running the job writes its counters at least
+    # every CAMPAIGN_PROGRESS_SECONDS
+    updated_at = Column(DateTime, nullable=False)
+    # Finished jobs are deleted CAMPAIGN_JOB_TTL_SECONDS after this
+    finished_at = Column(DateTime, nullable=True, index=True)
+    error = Column(Text, nullable=True)
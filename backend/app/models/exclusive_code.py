@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey
+from datetime import datetime
+
+from app.database import Base
+
+class ExclusiveCode(Base):
+    __tablename__ = "exclusive_codes"
+
+    # Keyed hash of the user id and the code; the code itself is never stored
+    code_hash = Column(String, primary_key=True)
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # The purge job deletes rows past this in batches
+    expires_at = Column(DateTime, nullable=False, index=True)
+    # Set on redemption; a code can only be redeemed once
+    used_at = Column(DateTime, nullable=True)
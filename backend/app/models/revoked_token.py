@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, DateTime
+from datetime import datetime
+
+from app.database import Base
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    # The token's jti claim
+    jti = Column(String, primary_key=True)
+    user_id = Column(String, nullable=False)
+    # Rows are pruned once the token would have expired anyway
+    expires_at = Column(DateTime, nullable=False, index=True)
+    # Workers sync their Bloom filters from rows revoked since their last sync
+    revoked_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, String, Boolean, DateTime, func, Text
+from sqlalchemy import Column, String, Boolean, DateTime, Index, Integer, func, Text
 from sqlalchemy.sql import expression
+from datetime import datetime
 import uuid
 
 from app.database import Base
@@ -15,7 +16,20 @@ class User(Base):
     provider_user_id = Column(String, nullable=True)
     is_active = Column(Boolean, server_default=expression.true())
     is_verified = Column(Boolean, server_default=expression.false())
-    created_at = Column(DateTime, server_default=func.now())
+    # Set client-side so SQLite stores one timestamp format (with
+    # microseconds); the keyset cursor compares these values directly
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     exclusive_access = Column(Boolean, server_default=expression.false())
-    exclusive_code = Column(String, nullable=True)
\ No newline at end of file
+    # Bumped whenever claims embedded in access tokens change; older tokens are stale
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        # OAuth callbacks look returning users up by their provider account
+        Index("ix_users_provider_provider_user_id", "provider", "provider_user_id", unique=True),
+        # Keyset pagination order for the user listing
+        Index("ix_users_created_at_id", "created_at", "id"),
+        # Email lookups are case-insensitive, so addresses are unique
+        # regardless of case
+        Index("ix_users_email_lower", func.lower(email), unique=True),
+    )
@@ -1,7 +1,9 @@
-from pydantic import BaseModel, EmailStr, Field, field_validator
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
+from typing import Dict, List, Optional
 from datetime import datetime
 
+from app.config import USER_BATCH_MAX_IDS
+
 # Request schemas
 class UserCreate(BaseModel):
     name: str
@@ -34,6 +36,18 @@ class UserLogin(BaseModel):
 class ExclusiveCodeRequest(BaseModel):
     email: EmailStr
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
+class RevokeRequest(BaseModel):
+    token: str
+
+class UserBatchRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=USER_BATCH_MAX_IDS)
+
 # Response schemas
 class UserResponse(BaseModel):
     id: str
@@ -45,14 +59,19 @@ class UserResponse(BaseModel):
     provider: str
     exclusive_access: bool
     
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class Token(BaseModel):
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str
     user: UserResponse
 
 class ExclusiveCodeResponse(BaseModel):
     message: str
-    code_sent: bool
\ No newline at end of file
+    code_sent: bool
+
+class UserBatchResponse(BaseModel):
+    # Every requested id is a key; ids with no user map to null
+    users: Dict[str, Optional[UserResponse]]
+    not_found: List[str]
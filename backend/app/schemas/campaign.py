@@ -0,0 +1,41 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Optional
+from datetime import datetime
+
+from app.config import CAMPAIGN_MAX_EMAILS
+
+# Request schemas
+class CampaignFilter(BaseModel):
+    provider: Optional[str] = None
+    is_verified: Optional[bool] = None
+    exclusive_access: Optional[bool] = None
+    email_prefix: Optional[str] = Field(None, min_length=1)
+
+class ExclusiveCodeCampaignRequest(BaseModel):
+    # Plain strings: addresses only need to match a user, and validating
+    # 100k of them as EmailStr would take seconds
+    emails: Optional[List[str]] = Field(None, min_length=1, max_length=CAMPAIGN_MAX_EMAILS)
+    filter: Optional[CampaignFilter] = None
+
+    @model_validator(mode="after")
+    def one_audience(self):
+        if (self.emails is None) == (self.filter is None):
+            raise ValueError("Give either emails or filter")
+        return self
+
+# Response schemas
+class CampaignJobResponse(BaseModel):
+    id: str
+    status: str
+    requested: Optional[int]
+    matched: int
+    not_found: int
+    codes_issued: int
+    queued: int
+    sent: int
+    failed: int
+    created_at: datetime
+    # Last progress write by the worker running the job
+    updated_at: datetime
+    finished_at: Optional[datetime]
+    error: Optional[str]
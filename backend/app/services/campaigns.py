@@ -0,0 +1,243 @@
+import asyncio
+import logging
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+from sqlalchemy import delete, func, select, tuple_, update
+
+from app.config import (
+    CAMPAIGN_CHUNK_SIZE,
+    CAMPAIGN_PROGRESS_SECONDS,
+    CAMPAIGN_STALE_SECONDS,
+    CAMPAIGN_JOB_TTL_SECONDS
+)
+from app.core.pagination import escape_like
+from app.database import AsyncSessionLocal
+from app.models.campaign_job import CampaignJob
+from app.models.user import User
+from app.services.email import build_exclusive_code_message, campaign_outbox
+from app.services.exclusive_codes import issue_codes
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("pending", "running", "sending")
+
+@dataclass
+class CampaignProgress:
+    """
+    Counters of a job running in this process, written to its
+    campaign_jobs row as the job goes
+    """
+    id: str
+    status: str = "pending"
+    requested: Optional[int] = None
+    matched: int = 0
+    not_found: int = 0
+    codes_issued: int = 0
+    queued: int = 0
+    sent: int = 0
+    failed: int = 0
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    _delivered: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    def record_delivery(self, sent: bool) -> None:
+        # Called by the outbox workers for every queued message
+        if sent:
+            self.sent += 1
+        else:
+            self.failed += 1
+        if self.status == "sending" and self.sent + self.failed >= self.queued:
+            self._delivered.set()
+
+    def values(self) -> Dict[str, Any]:
+        return {name: value for name, value in vars(self).items() if not name.startswith("_") and name != "id"}
+
+def job_payload(job: CampaignJob) -> Dict[str, Any]:
+    return {column.name: getattr(job, column.name) for column in CampaignJob.__table__.columns}
+
+async def _users_by_email(job: CampaignProgress, emails: List[str], chunk_size: int) -> AsyncIterator[List[Any]]:
+    # Duplicates and case variants of an address count once
+    addresses = list(dict.fromkeys(email.strip().lower() for email in emails))
+    job.requested = len(addresses)
+    for start in range(0, len(addresses), chunk_size):
+        chunk = addresses[start:start + chunk_size]
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(User.id, User.email)
+                .where(func.lower(User.email).in_(chunk), User.is_active.is_(True))
+            )
+            users = result.all()
+        job.not_found += len(chunk) - len(users)
+        yield users
+
+async def _users_by_filter(job: CampaignProgress, filters: Dict[str, Any], chunk_size: int) -> AsyncIterator[List[Any]]:
+    # Same filters and keyset order as GET /api/users
+    statement = (
+        select(User.id, User.email, User.created_at)
+        .where(User.is_active.is_(True))
+        .order_by(User.created_at, User.id)
+        .limit(chunk_size)
+    )
+    if filters.get("provider") is not None:
+        statement = statement.where(User.provider == filters["provider"])
+    if filters.get("exclusive_access") is not None:
+        statement = statement.where(User.exclusive_access == filters["exclusive_access"])
+    if filters.get("is_verified") is not None:
+        statement = statement.where(User.is_verified == filters["is_verified"])
+    if filters.get("email_prefix"):
+        statement = statement.where(
+            func.lower(User.email).like(escape_like(filters["email_prefix"].lower()) + "%", escape="\\")
+        )
+
+    last = None
+    while True:
+        page = statement
+        if last is not None:
+            page = page.where(tuple_(User.created_at, User.id) > tuple_(last.created_at, last.id))
+        async with AsyncSessionLocal() as db:
+            users = (await db.execute(page)).all()
+        if users:
+            yield users
+        if len(users) < chunk_size:
+            return
+        last = users[-1]
+
+class CampaignRunner:
+    """
+    Runs exclusive code campaigns in the background. Each chunk of users
+    is resolved with one query and gets its codes in one DELETE and one
+    INSERT; its emails then go to the campaign outbox, whose bounded
+    queue holds the campaign back to the pace the SMTP workers deliver
+    at.
+
+    A job runs on the worker that accepted it, but its row in
+    campaign_jobs is what every worker reports from. The running worker
+    rewrites the counters every progress_seconds; a job whose row stops
+    moving for stale_seconds lost its worker and is reported failed.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = CAMPAIGN_CHUNK_SIZE,
+        progress_seconds: float = CAMPAIGN_PROGRESS_SECONDS,
+        stale_seconds: float = CAMPAIGN_STALE_SECONDS,
+        job_ttl: float = CAMPAIGN_JOB_TTL_SECONDS
+    ):
+        self.chunk_size = chunk_size
+        self.progress_seconds = progress_seconds
+        self.stale_seconds = stale_seconds
+        self.job_ttl = job_ttl
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, emails: Optional[List[str]] = None, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        now = datetime.utcnow()
+        progress = CampaignProgress(id=str(uuid.uuid4()))
+        job = CampaignJob(id=progress.id, created_at=now, updated_at=now, **progress.values())
+        async with AsyncSessionLocal() as db:
+            # Old finished jobs go as new ones come in
+            await db.execute(
+                delete(CampaignJob)
+                .where(CampaignJob.finished_at < now - timedelta(seconds=self.job_ttl))
+                .execution_options(synchronize_session=False)
+            )
+            db.add(job)
+            await db.commit()
+            payload = job_payload(job)
+
+        task = asyncio.create_task(self._run(progress, emails, filters), name=f"campaign-{progress.id}")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return payload
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            job = await db.get(CampaignJob, job_id)
+            if job is None:
+                return None
+            cutoff = now - timedelta(seconds=self.stale_seconds)
+            if job.status in ACTIVE_STATUSES and job.updated_at < cutoff:
+                # Conditional, so a job that just wrote its progress is left alone
+                await db.execute(
+                    update(CampaignJob)
+                    .where(
+                        CampaignJob.id == job_id,
+                        CampaignJob.status.in_(ACTIVE_STATUSES),
+                        CampaignJob.updated_at < cutoff,
+                    )
+                    .values(status="failed", error="Interrupted: the server running it stopped", finished_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+                await db.refresh(job)
+            return job_payload(job)
+
+    async def _save(self, progress: CampaignProgress) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(CampaignJob)
+                .where(CampaignJob.id == progress.id)
+                .values(updated_at=datetime.utcnow(), **progress.values())
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+    async def _report_progress(self, progress: CampaignProgress) -> None:
+        # Also runs while the job waits on a full outbox or on delivery
+        while True:
+            await asyncio.sleep(self.progress_seconds)
+            try:
+                await self._save(progress)
+            except Exception as e:
+                logger.error(f"Failed to save progress of campaign {progress.id}: {str(e)}")
+
+    async def _run(self, job: CampaignProgress, emails: Optional[List[str]], filters: Optional[Dict[str, Any]]) -> None:
+        job.status = "running"
+        reporter = asyncio.create_task(self._report_progress(job), name=f"campaign-progress-{job.id}")
+        try:
+            if emails is not None:
+                chunks = _users_by_email(job, emails, self.chunk_size)
+            else:
+                chunks = _users_by_filter(job, filters or {}, self.chunk_size)
+
+            async for users in chunks:
+                job.matched += len(users)
+                async with AsyncSessionLocal() as db:
+                    codes = await issue_codes(db, [user.id for user in users])
+                job.codes_issued += len(codes)
+                for user in users:
+                    message = build_exclusive_code_message(user.email, codes[user.id])
+                    await campaign_outbox.put(user.email, message, job.record_delivery)
+                    job.queued += 1
+
+            job.status = "sending"
+            if job.sent + job.failed < job.queued:
+                await job._delivered.wait()
+            job.status = "completed"
+            logger.info(f"Campaign {job.id} completed: {job.sent} sent, {job.failed} failed")
+        except asyncio.CancelledError:
+            job.status = "failed"
+            job.error = "Cancelled by shutdown"
+            raise
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logger.error(f"Campaign {job.id} failed: {str(e)}")
+        finally:
+            job.finished_at = datetime.utcnow()
+            reporter.cancel()
+            await asyncio.gather(reporter, return_exceptions=True)
+            try:
+                await self._save(job)
+            except Exception as e:
+                logger.error(f"Failed to save the outcome of campaign {job.id}: {str(e)}")
+
+    async def stop(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+campaign_runner = CampaignRunner()
@@ -1,10 +1,34 @@
+import asyncio
+import random
+import time
 import smtplib
+from dataclasses import dataclass
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from typing import Callable, List, Optional
 import uuid
 import logging
 
-from app.config import SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASSWORD, EMAIL_FROM, EMAIL_FROM_NAME
+from app.config import (
+    SMTP_HOST,
+    SMTP_PORT,
+    SMTP_USER,
+    SMTP_PASSWORD,
+    SMTP_STARTTLS,
+    SMTP_TIMEOUT_SECONDS,
+    EMAIL_FROM,
+    EMAIL_FROM_NAME,
+    EMAIL_OUTBOX_WORKERS,
+    EMAIL_OUTBOX_BATCH_SIZE,
+    EMAIL_OUTBOX_MAX_SIZE,
+    EMAIL_OUTBOX_MAX_ATTEMPTS,
+    EMAIL_OUTBOX_RETRY_BASE_SECONDS,
+    EXCLUSIVE_CODE_TTL_HOURS,
+    CAMPAIGN_EMAIL_WORKERS,
+    CAMPAIGN_EMAIL_BATCH_SIZE,
+    CAMPAIGN_EMAIL_QUEUE_SIZE
+)
+from app.core.metrics import smtp_send_duration, smtp_messages_total
 
 logger = logging.getLogger(__name__)
 
@@ -14,14 +38,13 @@ def generate_exclusive_code() -> str:
     """
     return str(uuid.uuid4())[:8].upper()
 
-async def send_exclusive_code(email: str, code: str) -> bool:
+def smtp_configured() -> bool:
+    return bool(SMTP_USER and SMTP_PASSWORD)
+
+def build_exclusive_code_message(email: str, code: str) -> MIMEMultipart:
     """
-    Send the exclusive access code to the user's email
+    Build the exclusive access code email
     """
-    if not SMTP_USER or not SMTP_PASSWORD:
-        logger.warning("SMTP credentials not configured. Email not sent.")
-        return False
-    
     message = MIMEMultipart("alternative")
     message["Subject"] = f"Your Exclusive Access Code for Ventry"
     message["From"] = f"{EMAIL_FROM_NAME} <{EMAIL_FROM}>"
@@ -37,7 +60,7 @@ async def send_exclusive_code(email: str, code: str) -> bool:
     
     Please enter this code in the application to unlock premium features.
     
-    This code will expire in 24 hours.
+    This code will expire in {EXCLUSIVE_CODE_TTL_HOURS} hours.
     
     Best regards,
     The Ventry Team
@@ -56,7 +79,7 @@ async def send_exclusive_code(email: str, code: str) -> bool:
             {code}
           </div>
           <p>Please enter this code in the application to unlock premium features.</p>
-          <p>This code will expire in 24 hours.</p>
+          <p>This code will expire in {EXCLUSIVE_CODE_TTL_HOURS} hours.</p>
           <p>Best regards,<br>The Ventry Team</p>
         </div>
       </body>
@@ -69,12 +92,218 @@ async def send_exclusive_code(email: str, code: str) -> bool:
     message.attach(part1)
     message.attach(part2)
     
-    try:
-        with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
-            server.starttls()
-            server.login(SMTP_USER, SMTP_PASSWORD)
-            server.sendmail(EMAIL_FROM, email, message.as_string())
+    return message
+
+@dataclass
+class OutboxMessage:
+    to: str
+    body: str
+    attempts: int = 0
+    # Called with True once sent, or False once the message is given up on
+    on_done: Optional[Callable[[bool], None]] = None
+
+    def done(self, sent: bool) -> None:
+        if self.on_done is not None:
+            self.on_done(sent)
+
+class SMTPSession:
+    """
+    One long-lived SMTP connection, reopened lazily when the server drops it.
+    Blocking; only ever used from one worker thread at a time.
+    """
+
+    def __init__(self):
+        self._smtp: Optional[smtplib.SMTP] = None
+
+    def _connect(self) -> smtplib.SMTP:
+        smtp = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT_SECONDS)
+        if SMTP_STARTTLS:
+            smtp.starttls()
+        smtp.login(SMTP_USER, SMTP_PASSWORD)
+        self._smtp = smtp
+        return smtp
+
+    def _send(self, item: OutboxMessage) -> None:
+        smtp = self._smtp or self._connect()
+        try:
+            smtp.sendmail(EMAIL_FROM, item.to, item.body)
+        except smtplib.SMTPServerDisconnected:
+            # Idle connections get dropped by the server; reconnect once
+            self.close()
+            self._connect().sendmail(EMAIL_FROM, item.to, item.body)
+
+    def send_batch(self, batch: List[OutboxMessage]) -> List[OutboxMessage]:
+        """
+        Send every message over the shared connection and return the failures
+        """
+        failed = []
+        for item in batch:
+            try:
+                self._send(item)
+            except Exception as e:
+                logger.error(f"Failed to send email to {item.to}: {str(e)}")
+                # The connection is in an unknown state after an error
+                self.close()
+                failed.append(item)
+        return failed
+
+    def close(self) -> None:
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            self._smtp.close()
+        self._smtp = None
+
+class EmailOutbox:
+    """
+    In-memory queue of outgoing emails drained by background workers.
+    Messages still queued or waiting for a retry are lost on shutdown.
+    """
+
+    def __init__(
+        self,
+        workers: int = EMAIL_OUTBOX_WORKERS,
+        batch_size: int = EMAIL_OUTBOX_BATCH_SIZE,
+        max_size: int = EMAIL_OUTBOX_MAX_SIZE,
+        max_attempts: int = EMAIL_OUTBOX_MAX_ATTEMPTS,
+        retry_base_seconds: float = EMAIL_OUTBOX_RETRY_BASE_SECONDS
+    ):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_size = max_size
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def size(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"email-outbox-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """
+        Give queued messages a chance to go out, then stop the workers
+        """
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Email outbox stopped with {self._queue.qsize()} message(s) unsent")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def enqueue(self, to: str, message: MIMEMultipart) -> bool:
+        """
+        Queue a message for delivery without waiting on the mail server
+        """
+        if not self.running:
+            logger.warning("Email outbox is not running. Email not queued.")
+            return False
+        try:
+            self._queue.put_nowait(OutboxMessage(to=to, body=message.as_string()))
+        except asyncio.QueueFull:
+            logger.error(f"Email outbox is full. Dropping email to {to}")
+            return False
         return True
-    except Exception as e:
-        logger.error(f"Failed to send email: {str(e)}")
-        return False
\ No newline at end of file
+
+    async def put(
+        self,
+        to: str,
+        message: MIMEMultipart,
+        on_done: Optional[Callable[[bool], None]] = None
+    ) -> None:
+        """
+        Queue a message, waiting for room instead of dropping it when the
+        outbox is full. For bulk senders, so they go only as fast as the
+        workers deliver.
+        """
+        if not self.running:
+            raise RuntimeError("Email outbox is not running")
+        await self._queue.put(OutboxMessage(to=to, body=message.as_string(), on_done=on_done))
+
+    def _requeue(self, item: OutboxMessage) -> None:
+        if not self.running:
+            item.done(False)
+            return
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            logger.error(f"Email outbox is full. Dropping retry of email to {item.to}")
+            item.done(False)
+
+    def _schedule_retry(self, item: OutboxMessage) -> None:
+        item.attempts += 1
+        if item.attempts >= self.max_attempts:
+            logger.error(f"Giving up on email to {item.to} after {item.attempts} attempts")
+            item.done(False)
+            return
+        # Exponential backoff with jitter so retries from a burst spread out
+        delay = self.retry_base_seconds * (2 ** (item.attempts - 1)) * random.uniform(0.5, 1.5)
+        asyncio.get_running_loop().call_later(delay, self._requeue, item)
+
+    async def _worker(self) -> None:
+        session = SMTPSession()
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except asyncio.QueueEmpty:
+                        break
+
+                start = time.perf_counter()
+                try:
+                    failed = await asyncio.to_thread(session.send_batch, batch)
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+                smtp_send_duration.observe(time.perf_counter() - start, ("error" if failed else "ok",))
+                smtp_messages_total.inc(("sent",), len(batch) - len(failed))
+                smtp_messages_total.inc(("failed",), len(failed))
+
+                failed_ids = {id(item) for item in failed}
+                for item in batch:
+                    if id(item) not in failed_ids:
+                        item.done(True)
+                for item in failed:
+                    self._schedule_retry(item)
+        finally:
+            session.close()
+
+email_outbox = EmailOutbox()
+
+# Bulk campaign sends; see app/services/campaigns.py
+campaign_outbox = EmailOutbox(
+    workers=CAMPAIGN_EMAIL_WORKERS,
+    batch_size=CAMPAIGN_EMAIL_BATCH_SIZE,
+    max_size=CAMPAIGN_EMAIL_QUEUE_SIZE
+)
+
+async def send_exclusive_code(email: str, code: str) -> bool:
+    """
+    Queue the exclusive access code email for the user
+    """
+    if not smtp_configured():
+        logger.warning("SMTP credentials not configured. Email not sent.")
+        return False
+
+    return email_outbox.enqueue(email, build_exclusive_code_message(email, code))
\ No newline at end of file
@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import hmac
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import (
+    SECRET_KEY,
+    EXCLUSIVE_CODE_TTL_HOURS,
+    EXCLUSIVE_CODE_PURGE_SECONDS,
+    EXCLUSIVE_CODE_PURGE_BATCH_SIZE
+)
+from app.database import AsyncSessionLocal
+from app.models.exclusive_code import ExclusiveCode
+from app.services.email import generate_exclusive_code
+
+logger = logging.getLogger(__name__)
+
+def hash_code(user_id: str, code: str) -> str:
+    """
+    Codes are short, so the hash is keyed with SECRET_KEY; a copy of the
+    table alone isn't enough to recover them. Including the user id
+    keeps codes of different users from colliding.
+    """
+    message = f"{user_id}:{code.strip().upper()}".encode()
+    return hmac.new(SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+async def issue_codes(db: AsyncSession, user_ids: List[str]) -> Dict[str, str]:
+    """
+    Store a new code for each user and return them in plain text for the
+    emails, keyed by user id. Codes issued earlier and not yet redeemed
+    stop working. One DELETE and one multi-row INSERT, whatever the
+    number of users.
+    """
+    codes = {user_id: generate_exclusive_code() for user_id in user_ids}
+    if not codes:
+        return codes
+    now = datetime.utcnow()
+    expires_at = now + timedelta(hours=EXCLUSIVE_CODE_TTL_HOURS)
+    await db.execute(
+        delete(ExclusiveCode)
+        .where(ExclusiveCode.user_id.in_(list(codes)), ExclusiveCode.used_at.is_(None))
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(insert(ExclusiveCode), [
+        {
+            "code_hash": hash_code(user_id, code),
+            "user_id": user_id,
+            "created_at": now,
+            "expires_at": expires_at,
+        }
+        for user_id, code in codes.items()
+    ])
+    await db.commit()
+    return codes
+
+async def issue_code(db: AsyncSession, user_id: str) -> str:
+    return (await issue_codes(db, [user_id]))[user_id]
+
+async def redeem_code(db: AsyncSession, user_id: str, code: str) -> bool:
+    """
+    Mark the user's code used if it is unexpired and unused. A single
+    UPDATE on the primary key, so two concurrent redemptions can't both
+    succeed. The caller commits, together with whatever the code grants.
+    """
+    now = datetime.utcnow()
+    result = await db.execute(
+        update(ExclusiveCode)
+        .where(
+            ExclusiveCode.code_hash == hash_code(user_id, code),
+            ExclusiveCode.user_id == user_id,
+            ExclusiveCode.used_at.is_(None),
+            ExclusiveCode.expires_at > now,
+        )
+        .values(used_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+class ExclusiveCodePurger:
+    """
+    Deletes expired codes, used or not, every interval seconds. Each
+    batch is its own short transaction, so purging a large backlog
+    never holds locks for long or blocks the event loop.
+    """
+
+    def __init__(
+        self,
+        interval: float = EXCLUSIVE_CODE_PURGE_SECONDS,
+        batch_size: int = EXCLUSIVE_CODE_PURGE_BATCH_SIZE
+    ):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.purged = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def purge(self) -> int:
+        total = 0
+        while True:
+            expired = (
+                select(ExclusiveCode.code_hash)
+                .where(ExclusiveCode.expires_at < datetime.utcnow())
+                .limit(self.batch_size)
+            )
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    delete(ExclusiveCode)
+                    .where(ExclusiveCode.code_hash.in_(expired.scalar_subquery()))
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+            total += result.rowcount
+            self.purged += result.rowcount
+            if result.rowcount < self.batch_size:
+                return total
+            # Let requests run between batches
+            await asyncio.sleep(0)
+
+    async def _purge_loop(self) -> None:
+        while True:
+            try:
+                purged = await self.purge()
+                if purged:
+                    logger.info(f"Purged {purged} expired exclusive code(s)")
+            except Exception as e:
+                logger.error(f"Failed to purge expired exclusive codes: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._purge_loop(), name="exclusive-code-purge")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+exclusive_code_purger = ExclusiveCodePurger()
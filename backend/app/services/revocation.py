@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Set
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import (
+    REVOCATION_BLOOM_CAPACITY,
+    REVOCATION_BLOOM_ERROR_RATE,
+    REVOCATION_SYNC_SECONDS,
+    REVOCATION_SYNC_OVERLAP_SECONDS,
+    REVOCATION_PRUNE_SECONDS
+)
+from app.core.bloom import BloomFilter
+from app.database import AsyncSessionLocal
+from app.models.revoked_token import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+# Rows read per round trip when loading the filter
+LOAD_BATCH_SIZE = 2000
+
+class RevocationList:
+    """
+    Revoked token ids, persisted in revoked_tokens with a Bloom filter in
+    front. A token the filter doesn't flag is not revoked, which settles
+    almost every request in memory; flagged tokens are confirmed against
+    the table.
+
+    A background task keeps the filter current: it picks up rows revoked
+    by other workers every sync_seconds, and every prune_seconds deletes
+    rows of expired tokens and rebuilds the filter without them. Until
+    the first load has finished every token is checked against the table.
+    """
+
+    def __init__(
+        self,
+        capacity: int = REVOCATION_BLOOM_CAPACITY,
+        error_rate: float = REVOCATION_BLOOM_ERROR_RATE,
+        sync_seconds: float = REVOCATION_SYNC_SECONDS,
+        overlap_seconds: float = REVOCATION_SYNC_OVERLAP_SECONDS,
+        prune_seconds: float = REVOCATION_PRUNE_SECONDS
+    ):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_seconds = sync_seconds
+        self.overlap_seconds = overlap_seconds
+        self.prune_seconds = prune_seconds
+        self.db_checks = 0
+        self._filter: Optional[BloomFilter] = None
+        # Jtis revoked here while a rebuild loads; its new filter gets them too
+        self._rebuild_revoked: Optional[Set[str]] = None
+        self._synced_at: Optional[datetime] = None
+        self._pruned_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._filter is not None
+
+    @property
+    def size(self) -> int:
+        return self._filter.count if self._filter is not None else 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._filter.nbytes if self._filter is not None else 0
+
+    def might_be_revoked(self, jti: str) -> bool:
+        return self._filter is None or jti in self._filter
+
+    async def is_revoked(self, db: AsyncSession, jti: str) -> bool:
+        if not self.might_be_revoked(jti):
+            return False
+        self.db_checks += 1
+        result = await db.execute(select(RevokedToken.jti).where(RevokedToken.jti == jti))
+        return result.scalar_one_or_none() is not None
+
+    async def revoke(self, db: AsyncSession, payload: Dict[str, Any]) -> bool:
+        """
+        Revoke a verified token by its claims. Returns True only if this
+        call revoked it: False for a token that was already revoked, by
+        this or a concurrent request, and for tokens without a jti, which
+        can't be revoked and just run out. Refresh token rotation relies
+        on this to let exactly one exchange win.
+        """
+        jti = payload.get("jti")
+        if not jti:
+            return False
+
+        if db.bind.dialect.name == "postgresql":
+            statement = postgresql.insert(RevokedToken).on_conflict_do_nothing()
+        else:
+            statement = sqlite.insert(RevokedToken).on_conflict_do_nothing()
+        result = await db.execute(statement.values(
+            jti=jti,
+            user_id=payload.get("sub", ""),
+            expires_at=datetime.utcfromtimestamp(payload["exp"]),
+            revoked_at=datetime.utcnow(),
+        ).returning(RevokedToken.jti))
+        inserted = result.scalar_one_or_none() is not None
+        await db.commit()
+
+        # Other workers see it after their next sync
+        if self._filter is not None:
+            self._filter.add(jti)
+        if self._rebuild_revoked is not None:
+            self._rebuild_revoked.add(jti)
+        return inserted
+
+    async def rebuild(self) -> None:
+        """
+        Load every revoked jti into a new filter sized for the table, and
+        swap it in once complete
+        """
+        started = datetime.utcnow()
+        self._rebuild_revoked = set()
+        try:
+            async with AsyncSessionLocal() as db:
+                rows = (await db.execute(select(func.count()).select_from(RevokedToken))).scalar_one()
+                bloom = BloomFilter(max(self.capacity, rows * 2), self.error_rate)
+                result = await db.stream(
+                    select(RevokedToken.jti).execution_options(yield_per=LOAD_BATCH_SIZE)
+                )
+                async for partition in result.partitions():
+                    for (jti,) in partition:
+                        bloom.add(jti)
+                    # Let requests run between batches of a large load
+                    await asyncio.sleep(0)
+
+            # Revocations committed after the load read past them would
+            # otherwise leave with the old filter
+            for jti in self._rebuild_revoked:
+                bloom.add(jti)
+            self._filter = bloom
+        finally:
+            self._rebuild_revoked = None
+        # Rows committed while loading are picked up by the next sync
+        self._synced_at = started
+        logger.info(f"Loaded {bloom.count} revoked token(s) into a {bloom.nbytes} byte Bloom filter")
+
+    async def sync(self) -> int:
+        """
+        Add rows revoked since the last sync. Rows are read again for
+        overlap_seconds, so late commits and clock skew aren't missed.
+        """
+        started = datetime.utcnow()
+        since = self._synced_at - timedelta(seconds=self.overlap_seconds)
+        added = 0
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(
+                select(RevokedToken.jti)
+                .where(RevokedToken.revoked_at >= since)
+                .execution_options(yield_per=LOAD_BATCH_SIZE)
+            )
+            async for partition in result.partitions():
+                for (jti,) in partition:
+                    if jti not in self._filter:
+                        self._filter.add(jti)
+                        added += 1
+        self._synced_at = started
+        return added
+
+    async def prune(self) -> int:
+        """
+        Delete rows of tokens that have expired, then rebuild the filter
+        so it stops flagging them
+        """
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                delete(RevokedToken).where(RevokedToken.expires_at < datetime.utcnow())
+            )
+            await db.commit()
+        self._pruned_at = time.monotonic()
+        if result.rowcount:
+            logger.info(f"Pruned {result.rowcount} expired revoked token(s)")
+            await self.rebuild()
+        return result.rowcount
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            try:
+                if self._filter is None or self._filter.saturated:
+                    await self.rebuild()
+                    self._pruned_at = time.monotonic()
+                elif time.monotonic() - self._pruned_at >= self.prune_seconds:
+                    await self.prune()
+                else:
+                    await self.sync()
+            except Exception as e:
+                logger.error(f"Failed to refresh the token revocation list: {str(e)}")
+            await asyncio.sleep(self.sync_seconds)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop(), name="revocation-refresh")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+revocation_list = RevocationList()
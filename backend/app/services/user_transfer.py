@@ -0,0 +1,253 @@
+import csv
+import json
+import sys
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+
+from app.core.security import get_password_hash, pwd_context
+from app.models.user import User
+
+# Columns written by export and understood by import, in file order
+EXPORT_FIELDS = [
+    "id",
+    "email",
+    "name",
+    "hashed_password",
+    "provider",
+    "provider_user_id",
+    "is_active",
+    "is_verified",
+    "exclusive_access",
+    "created_at",
+]
+
+# Rejected records kept for the report; the rest are only counted
+MAX_ERROR_SAMPLES = 100
+
+@dataclass
+class ImportReport:
+    read: int = 0
+    inserted: int = 0
+    skipped_existing: int = 0
+    hashed: int = 0
+    prehashed: int = 0
+    errors: int = 0
+    error_samples: List[str] = field(default_factory=list)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "read": self.read,
+            "inserted": self.inserted,
+            "skipped_existing": self.skipped_existing,
+            "hashed": self.hashed,
+            "prehashed": self.prehashed,
+            "errors": self.errors,
+        }
+
+def detect_format(path: str, fmt: Optional[str]) -> str:
+    if fmt:
+        return fmt
+    if path.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if path.endswith(".csv"):
+        return "csv"
+    raise ValueError(f"Can't tell the format of {path}; pass --format csv or jsonl")
+
+def read_records(stream: IO[str], fmt: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield one dict per user from a CSV (with header) or JSONL stream
+    """
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+    else:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+
+def _parse_bool(value: Any, default: bool) -> bool:
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "t", "yes", "y")
+
+def _parse_datetime(value: Any) -> Optional[datetime]:
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00")).replace(tzinfo=None)
+
+def prepare_row(record: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[str]]:
+    """
+    Turn an input record into column values. Returns the row and the
+    plaintext password still to be hashed, if any. Raises ValueError for
+    records that can't be imported.
+    """
+    # Stored as given, like signup; uniqueness is case-insensitive
+    email = (record.get("email") or "").strip()
+    if not email:
+        raise ValueError("missing email")
+
+    provider = record.get("provider") or "email"
+    password = record.get("password") or None
+    hashed_password = record.get("hashed_password") or None
+    if hashed_password is not None:
+        # Only hashes the app can verify are kept as they are
+        if pwd_context.identify(hashed_password) is None:
+            raise ValueError("hashed_password is not a supported hash")
+        password = None
+    elif password is None and provider == "email":
+        raise ValueError("email users need a password or hashed_password")
+
+    row = {
+        "id": record.get("id") or str(uuid.uuid4()),
+        "email": email,
+        "name": record.get("name") or email.split("@")[0],
+        # OAuth users are stored with an empty password, as in the callbacks
+        "hashed_password": hashed_password or "",
+        "provider": provider,
+        "provider_user_id": record.get("provider_user_id") or None,
+        "is_active": _parse_bool(record.get("is_active"), True),
+        "is_verified": _parse_bool(record.get("is_verified"), False),
+        "exclusive_access": _parse_bool(record.get("exclusive_access"), False),
+        "created_at": _parse_datetime(record.get("created_at")) or datetime.utcnow(),
+    }
+    return row, password
+
+def _chunks(records: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _insert_statement(engine: Engine):
+    # Rows whose id, email (in any case, through the unique lower(email)
+    # index) or provider account already exists are skipped, as are
+    # repeats within the file; RETURNING reports which ones went in
+    if engine.dialect.name == "postgresql":
+        statement = postgresql.insert(User).on_conflict_do_nothing()
+    elif engine.dialect.name == "sqlite":
+        statement = sqlite.insert(User).on_conflict_do_nothing()
+    else:
+        raise ValueError(f"Bulk import is not supported on {engine.dialect.name}")
+    return statement.returning(User.id)
+
+def _insert_chunk(engine: Engine, rows: List[Dict[str, Any]]) -> int:
+    # Executed with a list of rows, the statement is compiled once and sent
+    # as multi-row INSERT ... VALUES pages (SQLAlchemy's insertmanyvalues).
+    # One transaction per chunk, so a failure loses at most one chunk.
+    with engine.begin() as conn:
+        return len(conn.execute(_insert_statement(engine), rows).all())
+
+def import_users(
+    engine: Engine,
+    records: Iterable[Dict[str, Any]],
+    chunk_size: int = 5000,
+    workers: int = 0,
+    progress: Optional[Callable[[ImportReport], None]] = None,
+) -> ImportReport:
+    """
+    Insert users from records in chunks. Plaintext passwords are hashed on
+    a process pool (inline with 0 workers) while the previous chunk is
+    being written.
+    """
+    report = ImportReport()
+    executor: Optional[Executor] = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+    pending: Optional[Tuple[List[Dict[str, Any]], List[int], Iterable[str]]] = None
+
+    def finish(rows, needs_hash, hashes):
+        for index, hashed in zip(needs_hash, hashes):
+            rows[index]["hashed_password"] = hashed
+        if rows:
+            inserted = _insert_chunk(engine, rows)
+            report.inserted += inserted
+            report.skipped_existing += len(rows) - inserted
+        if progress:
+            progress(report)
+
+    try:
+        for chunk in _chunks(records, chunk_size):
+            rows, needs_hash, passwords = [], [], []
+            for record in chunk:
+                report.read += 1
+                try:
+                    row, password = prepare_row(record)
+                except ValueError as e:
+                    report.errors += 1
+                    if len(report.error_samples) < MAX_ERROR_SAMPLES:
+                        report.error_samples.append(f"record {report.read}: {e}")
+                    continue
+                if password is not None:
+                    needs_hash.append(len(rows))
+                    passwords.append(password)
+                elif row["hashed_password"]:
+                    report.prehashed += 1
+                rows.append(row)
+            report.hashed += len(passwords)
+
+            # Submitting now lets the pool hash this chunk while the previous one is inserted
+            if executor is not None:
+                hashes = executor.map(get_password_hash, passwords, chunksize=max(1, len(passwords) // (workers * 4)))
+            else:
+                hashes = map(get_password_hash, passwords)
+
+            if pending is not None:
+                finish(*pending)
+            pending = (rows, needs_hash, hashes)
+
+        if pending is not None:
+            finish(*pending)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    return report
+
+def _export_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def export_users(engine: Engine, stream: IO[str], fmt: str, include_hashes: bool = True, batch_size: int = 5000) -> int:
+    """
+    Write every user to the stream, reading rows through a server-side
+    cursor so memory stays flat regardless of table size
+    """
+    fields = [name for name in EXPORT_FIELDS if include_hashes or name != "hashed_password"]
+    # Primary key order is read straight off the index, with no sort step
+    statement = select(*(User.__table__.c[name] for name in fields)).order_by(User.id)
+
+    if fmt == "csv":
+        writer = csv.writer(stream)
+        writer.writerow(fields)
+
+        def write(row):
+            writer.writerow([_export_value(value) for value in row])
+    else:
+        def write(row):
+            stream.write(json.dumps(dict(zip(fields, map(_export_value, row)))) + "\n")
+
+    count = 0
+    with engine.connect() as conn:
+        result = conn.execution_options(yield_per=batch_size).execute(statement)
+        for row in result:
+            write(row)
+            count += 1
+    return count
+
+def open_input(path: str) -> IO[str]:
+    return sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+
+def open_output(path: str) -> IO[str]:
+    return sys.stdout if path == "-" else open(path, "w", newline="", encoding="utf-8")
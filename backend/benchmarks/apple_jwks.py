@@ -0,0 +1,121 @@
+"""
+Check Apple ID token verification against a local JWKS stub.
+
+Serves a JWKS document from localhost, then:
+  1. sends a burst of concurrent Apple callbacks signed with a key the
+     cache has never seen; they must share a single JWKS fetch,
+  2. rotates the stub to a new key and repeats; the unknown kid forces
+     exactly one more fetch,
+  3. sends a token signed by a key that is not published; it is rejected.
+
+    python -m benchmarks.apple_jwks --burst 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+
+from benchmarks.common import asgi_client, configure_environment, summarize
+
+JWKS_PORT = 8767
+CLIENT_ID = "com.example.ventry"
+
+configure_environment()
+os.environ.update({
+    "APPLE_CLIENT_ID": CLIENT_ID,
+    "APPLE_JWKS_URL": f"http://127.0.0.1:{JWKS_PORT}/auth/keys",
+    "APPLE_JWKS_MIN_REFRESH_SECONDS": "0",
+})
+
+import jwt  # noqa: E402
+import uvicorn  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import rsa  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+
+from app.config import APPLE_ISSUER  # noqa: E402
+from app.core.jwks import apple_jwks  # noqa: E402
+from app.main import app  # noqa: E402
+
+stub = FastAPI()
+published = {}
+stub_fetches = 0
+
+
+@stub.get("/auth/keys")
+async def keys():
+    global stub_fetches
+    stub_fetches += 1
+    # Simulate a slow upstream so concurrent callers overlap
+    await asyncio.sleep(0.05)
+    return {"keys": list(published.values())}
+
+
+def new_key(kid):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    public_jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key()))
+    public_jwk.update({"kid": kid, "alg": "RS256", "use": "sig"})
+    return private_key, public_jwk
+
+
+def id_token(private_key, kid, n):
+    now = int(time.time())
+    claims = {
+        "iss": APPLE_ISSUER, "aud": CLIENT_ID, "iat": now, "exp": now + 600,
+        "sub": f"apple-{kid}-{n}", "email": f"apple-{kid}-{n}@example.com",
+    }
+    return jwt.encode(claims, private_key, algorithm="RS256", headers={"kid": kid})
+
+
+async def burst(client, private_key, kid, count):
+    async def one(n):
+        start = time.perf_counter()
+        response = await client.post("/api/auth/apple/callback", data={"id_token": id_token(private_key, kid, n)})
+        return time.perf_counter() - start, response.status_code
+
+    results = await asyncio.gather(*(one(n) for n in range(count)))
+    return [r[0] for r in results], [r[1] for r in results]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--burst", type=int, default=50)
+    args = parser.parse_args()
+
+    server = uvicorn.Server(uvicorn.Config(stub, host="127.0.0.1", port=JWKS_PORT, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+
+    report = {}
+    try:
+        async with asgi_client(app) as client:
+            key_a, jwk_a = new_key("key-a")
+            published["key-a"] = jwk_a
+            latencies, statuses = await burst(client, key_a, "key-a", args.burst)
+            report["cold_burst"] = {"statuses": sorted(set(statuses)), "jwks_fetches": stub_fetches,
+                                    "latency": summarize(latencies)}
+
+            latencies, statuses = await burst(client, key_a, "key-a", args.burst)
+            report["warm_burst"] = {"statuses": sorted(set(statuses)), "jwks_fetches": stub_fetches,
+                                    "latency": summarize(latencies)}
+
+            key_b, jwk_b = new_key("key-b")
+            published["key-b"] = jwk_b
+            latencies, statuses = await burst(client, key_b, "key-b", args.burst)
+            report["rotated_burst"] = {"statuses": sorted(set(statuses)), "jwks_fetches": stub_fetches,
+                                       "latency": summarize(latencies)}
+
+            rogue_key, _ = new_key("key-a")
+            response = await client.post("/api/auth/apple/callback", data={"id_token": id_token(rogue_key, "key-a", 0)})
+            report["forged_token_status"] = response.status_code
+    finally:
+        server.should_exit = True
+
+    report["cached_kids"] = apple_jwks.kids
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
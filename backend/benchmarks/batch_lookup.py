@@ -0,0 +1,90 @@
+"""
+Resolving many user ids: one GET /api/users/{id} per id versus a single
+POST /api/users/batch.
+
+For each batch size, reports wall time and the number of SQL statements
+each approach ran (from the db_query_duration histogram). A tenth of the
+requested ids don't exist, and a few are repeated.
+
+    python -m benchmarks.batch_lookup --sizes 10 100 500
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from benchmarks.common import asgi_client, configure_environment, seed_user
+
+configure_environment()
+
+from sqlalchemy import insert  # noqa: E402
+
+from app.core.metrics import db_query_duration  # noqa: E402
+from app.database import AsyncSessionLocal  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+
+def statements_run() -> int:
+    return sum(sum(series.counts) for series in db_query_duration._series.values())
+
+
+async def measure(run):
+    before = statements_run()
+    start = time.perf_counter()
+    await run()
+    return round((time.perf_counter() - start) * 1000, 2), statements_run() - before
+
+
+async def main_async(args):
+    user_ids = [str(uuid.uuid4()) for _ in range(max(args.sizes))]
+    rng = random.Random(0)
+    report = []
+    async with asgi_client(app) as client:
+        async with AsyncSessionLocal() as db:
+            await db.execute(insert(User), [
+                {"id": user_id, "email": f"{user_id}@example.com", "name": "batch", "hashed_password": ""}
+                for user_id in user_ids
+            ])
+            await db.commit()
+        token = await seed_user(client, "batcher@example.com")
+        headers = {"Authorization": f"Bearer {token}"}
+
+        for size in args.sizes:
+            ids = rng.sample(user_ids, size)
+            ids[: size // 10] = [f"missing-{i}" for i in range(size // 10)]
+            ids += ids[:3]
+
+            async def one_by_one():
+                for user_id in ids:
+                    response = await client.get(f"/api/users/{user_id}", headers=headers)
+                    assert response.status_code in (200, 404), response.text
+
+            async def batched():
+                response = await client.post("/api/users/batch", json={"ids": ids}, headers=headers)
+                assert response.status_code == 200, response.text
+
+            single_ms, single_statements = await measure(one_by_one)
+            batch_ms, batch_statements = await measure(batched)
+            report.append({
+                "ids": len(ids),
+                "per_id_ms": single_ms,
+                "per_id_statements": single_statements,
+                "batch_ms": batch_ms,
+                "batch_statements": batch_statements,
+            })
+
+    print(json.dumps(report, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 497])
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Bulk import/export throughput for `manage.py import-users/export-users`.
+
+Generates --rows users (default 1M) as CSV or JSONL, mostly with
+pre-hashed bcrypt passwords and a --plaintext share that the import hashes
+on its process pool. Imports them into a freshly migrated database, then
+exports them again. Each command runs as its own process, so rows/s and
+peak RSS are the CLI's own. For comparison, --baseline-rows users are
+also inserted the way signup does it: one INSERT and commit per user.
+
+On SQLite, peak RSS includes the database pages mapped through
+SQLITE_MMAP_SIZE; run with SQLITE_MMAP_SIZE=0 to see the process's own memory.
+
+    python -m benchmarks.bulk_users --rows 1000000 --format csv
+"""
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+from benchmarks.common import configure_environment
+
+configure_environment()
+# Cheap hashes so the plaintext share measures the pool, not bcrypt's cost
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from passlib.hash import bcrypt  # noqa: E402
+
+from app.database import SessionLocal  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+FIELDS = ["email", "name", "password", "hashed_password", "provider", "is_verified"]
+
+
+def generate(path, fmt, rows, plaintext):
+    prehashed = bcrypt.using(rounds=12).hash("imported-password")
+    every = max(1, round(1 / plaintext)) if plaintext > 0 else 0
+    with open(path, "w", newline="") as stream:
+        writer = csv.writer(stream) if fmt == "csv" else None
+        if writer:
+            writer.writerow(FIELDS)
+        for i in range(rows):
+            plain = every and i % every == 0
+            record = [f"bulk-{i}@example.com", f"Bulk {i}", "Passw0rd!" if plain else "",
+                      "" if plain else prehashed, "email", "true"]
+            if writer:
+                writer.writerow(record)
+            else:
+                stream.write(json.dumps(dict(zip(FIELDS, record))) + "\n")
+
+
+def run_cli(*args):
+    """
+    Run manage.py and return (wall seconds, peak RSS in MiB)
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "manage.py", *args], env=os.environ.copy(),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    _, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - start
+    if os.waitstatus_to_exitcode(status) != 0:
+        raise RuntimeError(f"manage.py {' '.join(args)} failed")
+    return elapsed, usage.ru_maxrss / 1024
+
+
+def per_row_baseline(rows):
+    prehashed = bcrypt.using(rounds=4).hash("baseline")
+    start = time.perf_counter()
+    with SessionLocal() as db:
+        for i in range(rows):
+            db.add(User(id=str(uuid.uuid4()), email=f"baseline-{i}@example.com", name=f"Baseline {i}",
+                        hashed_password=prehashed, provider="email"))
+            db.commit()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    parser.add_argument("--plaintext", type=float, default=0.001, help="share of rows with a plaintext password")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--baseline-rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    command.upgrade(Config("alembic.ini"), "head")
+    workdir = tempfile.mkdtemp(prefix="ventry-bulk-")
+    source = os.path.join(workdir, f"users.{args.format}")
+    exported = os.path.join(workdir, f"export.{args.format}")
+    generate(source, args.format, args.rows, args.plaintext)
+
+    import_s, import_rss = run_cli("import-users", source, "--quiet", "--workers", str(args.workers),
+                                   "--chunk-size", str(args.chunk_size))
+    export_s, export_rss = run_cli("export-users", exported)
+    baseline_s = per_row_baseline(args.baseline_rows) if args.baseline_rows else 0
+
+    print(json.dumps({
+        "rows": args.rows,
+        "format": args.format,
+        "plaintext_rows": round(args.rows * args.plaintext),
+        "import": {"seconds": round(import_s, 2), "rows_per_s": round(args.rows / import_s), "peak_rss_mib": round(import_rss, 1)},
+        "export": {"seconds": round(export_s, 2), "rows_per_s": round(args.rows / export_s), "peak_rss_mib": round(export_rss, 1)},
+        "per_row_insert_baseline": {
+            "rows": args.baseline_rows,
+            "rows_per_s": round(args.baseline_rows / baseline_s) if baseline_s else None,
+        },
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
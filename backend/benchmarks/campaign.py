@@ -0,0 +1,171 @@
+"""
+Exclusive code campaigns against a local aiosmtpd stand-in.
+
+Inserts --users users, starts one campaign by email list and one by
+filter through /api/campaigns/exclusive-codes, polls each job until it
+finishes and reports time, users per second, SQL statements per 1000
+users and SMTP connections. For comparison, sends --sample codes one at
+a time through /api/auth/request-code, the only way to reach many users
+before, and extrapolates that to --users.
+
+    pip install aiosmtpd
+    python -m benchmarks.campaign --users 100000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+from benchmarks.common import asgi_client, configure_environment
+
+SMTP_PORT = 8025
+ADMIN_KEY = "bench-admin-key"
+
+configure_environment()
+os.environ.update({
+    "SMTP_HOST": "127.0.0.1",
+    "SMTP_PORT": str(SMTP_PORT),
+    "SMTP_USER": "bench",
+    "SMTP_PASSWORD": "bench",
+    "SMTP_STARTTLS": "false",
+    "EMAIL_FROM": "bench@example.com",
+    "ADMIN_API_KEY": ADMIN_KEY,
+})
+
+from aiosmtpd.controller import Controller  # noqa: E402
+from sqlalchemy import func, insert, select  # noqa: E402
+
+from app.core.metrics import db_query_duration  # noqa: E402
+from app.database import AsyncSessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.exclusive_code import ExclusiveCode  # noqa: E402
+from app.models.user import User  # noqa: E402
+from benchmarks.email_outbox import CountingHandler, accept_any  # noqa: E402
+
+HEADERS = {"X-Admin-Key": ADMIN_KEY}
+INSERT_BATCH = 50000
+
+
+def statements_run() -> int:
+    return sum(sum(series.counts) for series in db_query_duration._series.values())
+
+
+def fill(users):
+    for start in range(0, users, INSERT_BATCH):
+        with engine.begin() as conn:
+            conn.execute(insert(User), [
+                {
+                    "id": f"user-{i}",
+                    "email": f"User-{i}@example.com",
+                    "name": "campaign",
+                    "hashed_password": "",
+                    # A quarter verified, for the filter campaign
+                    "is_verified": i % 4 == 0,
+                }
+                for i in range(start, min(start + INSERT_BATCH, users))
+            ])
+
+
+async def run_campaign(client, handler, body):
+    messages_before, connections_before = handler.messages, handler.connections
+    statements_before = statements_run()
+    start = time.perf_counter()
+    response = await client.post("/api/campaigns/exclusive-codes", json=body, headers=HEADERS)
+    accepted_ms = (time.perf_counter() - start) * 1000
+    assert response.status_code == 202, response.text
+    job_id = response.json()["id"]
+
+    while True:
+        await asyncio.sleep(0.25)
+        job = (await client.get(f"/api/campaigns/{job_id}", headers=HEADERS)).json()
+        if job["status"] in ("completed", "failed"):
+            break
+    elapsed = time.perf_counter() - start
+    return {
+        "job": {key: job[key] for key in ("status", "requested", "matched", "not_found", "codes_issued", "sent", "failed")},
+        "accepted_ms": round(accepted_ms, 1),
+        "seconds": round(elapsed, 2),
+        "users_per_second": round(job["sent"] / elapsed),
+        "statements_per_1000_users": round((statements_run() - statements_before) / max(job["matched"], 1) * 1000, 1),
+        "messages_received": handler.messages - messages_before,
+        "smtp_connections": handler.connections - connections_before,
+    }
+
+
+async def request_code_path(client, handler, sample, users):
+    messages_before = handler.messages
+    start = time.perf_counter()
+    for i in range(sample):
+        response = await client.post("/api/auth/request-code", json={"email": f"user-{i}@example.com"})
+        assert response.json()["code_sent"], response.text
+    while handler.messages - messages_before < sample and time.perf_counter() - start < 120:
+        await asyncio.sleep(0.05)
+    elapsed = time.perf_counter() - start
+    return {
+        "sample": sample,
+        "seconds": round(elapsed, 2),
+        "users_per_second": round(sample / elapsed),
+        "extrapolated_seconds_for_all": round(elapsed / sample * users),
+    }
+
+
+async def unused_codes():
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(
+            select(func.count()).select_from(ExclusiveCode).where(ExclusiveCode.used_at.is_(None))
+        )).scalar_one()
+
+
+async def main_async(args):
+    handler = CountingHandler()
+    controller = Controller(
+        handler, hostname="127.0.0.1", port=SMTP_PORT,
+        authenticator=accept_any, auth_require_tls=False,
+    )
+    controller.start()
+    # aiosmtpd logs every SMTP command at INFO
+    logging.getLogger("mail.log").setLevel(logging.WARNING)
+    try:
+        async with asgi_client(app) as client:
+            start = time.perf_counter()
+            fill(args.users)
+            report = {"users": args.users, "fill_seconds": round(time.perf_counter() - start, 1)}
+
+            # A full list of --users addresses: 100 unknown, 100 repeated,
+            # and a different case from the stored ones
+            emails = [f"user-{i}@example.com" for i in range(args.users - 200)]
+            emails += [f"missing-{i}@example.com" for i in range(100)] + emails[:100]
+            report["by_emails"] = await run_campaign(client, handler, {"emails": emails})
+            report["by_filter"] = await run_campaign(client, handler, {"filter": {"is_verified": True}})
+            # One unused code per user: each campaign replaced the last
+            report["unused_codes"] = await unused_codes()
+            report["request_code_one_by_one"] = await request_code_path(client, handler, args.sample, args.users)
+    finally:
+        controller.stop()
+
+    print(json.dumps(report, indent=2))
+    by_emails, by_filter = report["by_emails"], report["by_filter"]
+    ok = (
+        by_emails["job"]["status"] == "completed"
+        and by_emails["job"]["sent"] == args.users - 200
+        and by_emails["job"]["not_found"] == 100
+        and by_emails["messages_received"] == args.users - 200
+        and by_filter["job"]["sent"] == (args.users + 3) // 4
+        and report["unused_codes"] == args.users - 200 + sum(i % 4 == 0 for i in range(args.users - 200, args.users))
+    )
+    return 0 if ok else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--sample", type=int, default=500)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
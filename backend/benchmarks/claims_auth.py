@@ -0,0 +1,130 @@
+"""
+Authorizing a request from the access token's claims versus loading the
+user behind it.
+
+Mounts two bare endpoints, one depending on get_current_user and one on
+get_current_claims, and reports per-request latency and SQL statements
+(from the db_query_duration histogram) for each. The user cache is
+cleared before every get_current_user request, as it is for the first
+request of a user on each worker. Then checks that granting exclusive
+access makes the old token stale until it is refreshed.
+
+    python -m benchmarks.claims_auth --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from benchmarks.common import asgi_client, configure_environment, summarize
+
+configure_environment()
+# The revocation list's background sync queries every few seconds; keep
+# it out of the statements counted for requests
+os.environ.setdefault("REVOCATION_SYNC_SECONDS", "3600")
+
+from fastapi import Depends  # noqa: E402
+
+from app.api.deps import get_current_claims, get_current_user  # noqa: E402
+from app.core.cache import user_cache  # noqa: E402
+from app.core.metrics import db_query_duration  # noqa: E402
+from app.database import AsyncSessionLocal  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.exclusive_codes import issue_code  # noqa: E402
+
+PASSWORD = "Bench-passw0rd"
+
+
+@app.get("/bench/user")
+async def bench_user(current_user: User = Depends(get_current_user)):
+    return {"id": current_user.id}
+
+
+@app.get("/bench/claims")
+async def bench_claims(claims=Depends(get_current_claims)):
+    return {"id": claims.user_id}
+
+
+def statements_run() -> int:
+    return sum(sum(series.counts) for series in db_query_duration._series.values())
+
+
+async def measure(client, path, headers, requests, clear_cache):
+    latencies = []
+    before = statements_run()
+    for _ in range(requests):
+        if clear_cache:
+            user_cache.clear()
+        start = time.perf_counter()
+        response = await client.get(path, headers=headers)
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.text
+    return {
+        "statements_per_request": round((statements_run() - before) / requests, 3),
+        "latency": summarize(latencies),
+    }
+
+
+async def check_staleness(client, tokens):
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    user_id = tokens["user"]["id"]
+    async with AsyncSessionLocal() as db:
+        # The plain code is only ever in the email; issue one directly
+        code = await issue_code(db, user_id)
+
+    granted = await client.put("/api/users/me/update-exclusive", params={"exclusive_code": code}, headers=headers)
+    stale = await client.get("/bench/claims", headers=headers)
+
+    before = statements_run()
+    refreshed = await client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    refresh_statements = statements_run() - before
+    fresh = await client.get(
+        "/bench/claims", headers={"Authorization": f"Bearer {refreshed.json()['access_token']}"}
+    )
+    return {
+        "grant_status": granted.status_code,
+        "old_token_status": stale.status_code,
+        "refresh_status": refreshed.status_code,
+        "refresh_statements": refresh_statements,
+        "refreshed_token_status": fresh.status_code,
+    }
+
+
+async def main_async(args):
+    async with asgi_client(app) as client:
+        response = await client.post("/api/auth/signup", json={
+            "name": "claims", "email": "claims@example.com",
+            "password": PASSWORD, "confirmPassword": PASSWORD,
+        })
+        response.raise_for_status()
+        tokens = response.json()
+        headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+        report = {
+            "get_current_user_cold_cache": await measure(client, "/bench/user", headers, args.requests, True),
+            "get_current_claims": await measure(client, "/bench/claims", headers, args.requests, False),
+            "staleness": await check_staleness(client, tokens),
+        }
+
+    print(json.dumps(report, indent=2))
+    staleness = report["staleness"]
+    ok = (
+        report["get_current_claims"]["statements_per_request"] == 0
+        and staleness["old_token_status"] == 401
+        and staleness["refreshed_token_status"] == 200
+    )
+    return 0 if ok else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Run every benchmark from the backend folder, e.g.
+    python -m benchmarks.password_pool
+"""
+import os
+import socket
+import statistics
+import tempfile
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List
+
+import httpx
+
+DEFAULT_PASSWORD = "BenchPassw0rd"
+
+
+def configure_environment() -> str:
+    """
+    Point the app at a throwaway SQLite file (or BENCH_DATABASE_URL) and
+    turn off login/signup throttling so seeding users isn't rate limited.
+    Must be called before anything under app/ is imported.
+    """
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        tmpdir = tempfile.mkdtemp(prefix="ventry-bench-")
+        url = f"sqlite:///{tmpdir}/bench.db"
+    os.environ["DATABASE_URL"] = url
+    return url
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """
+    Latency summary in milliseconds for a list of durations in seconds
+    """
+    return {
+        "count": len(samples),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3) if samples else 0.0,
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "max_ms": round(max(samples) * 1000, 3) if samples else 0.0,
+    }
+
+
+@asynccontextmanager
+async def asgi_client(app) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    In-process client that drives the ASGI app without a network hop.
+    The app's lifespan runs around it, so the database is initialized.
+    """
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            yield client
+
+
+async def seed_user(client: httpx.AsyncClient, email: str, password: str = DEFAULT_PASSWORD) -> str:
+    """
+    Sign a user up (or log in if they already exist) and return a bearer token
+    """
+    response = await client.post("/api/auth/signup", json={
+        "name": email.split("@")[0],
+        "email": email,
+        "password": password,
+        "confirmPassword": password,
+    })
+    if response.status_code == 400:
+        response = await client.post("/api/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
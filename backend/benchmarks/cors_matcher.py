@@ -0,0 +1,92 @@
+"""
+Origin checks with thousands of distinct origins.
+
+Compares the old approach (a Python list that every new app.github.dev
+origin was appended to, checked by linear membership) with OriginMatcher
+(exact set + one compiled wildcard regex + bounded decision LRU), then
+measures CORS preflights through the real app.
+
+    python -m benchmarks.cors_matcher --origins 5000
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from benchmarks.common import asgi_client, configure_environment, summarize
+
+configure_environment()
+
+from app.config import ALLOWED_ORIGINS  # noqa: E402
+from app.core.cors import OriginMatcher  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+def make_origins(count, rng):
+    origins = []
+    for i in range(count):
+        kind = rng.random()
+        if kind < 0.6:
+            origins.append(f"https://space-{i}-3000.app.github.dev")
+        elif kind < 0.9:
+            origins.append(f"https://evil-{i}.example.com")
+        else:
+            origins.append(rng.choice(["http://localhost:3000", "http://localhost:8080"]))
+    return origins
+
+
+def legacy_check(allowed, origin):
+    # What the previous middleware did on every request
+    if "app.github.dev" in origin and origin not in allowed:
+        allowed.append(origin)
+    return origin in allowed
+
+
+def time_checks(check, stream):
+    start = time.perf_counter()
+    for origin in stream:
+        check(origin)
+    return (time.perf_counter() - start) / len(stream) * 1_000_000
+
+
+async def preflights(stream):
+    latencies, statuses = [], {}
+    async with asgi_client(app) as client:
+        for origin in stream:
+            start = time.perf_counter()
+            response = await client.options("/api/users/me", headers={
+                "Origin": origin, "Access-Control-Request-Method": "GET",
+            })
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    return summarize(latencies), statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--origins", type=int, default=5000, help="distinct origins")
+    parser.add_argument("--checks", type=int, default=100_000)
+    parser.add_argument("--preflights", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    origins = make_origins(args.origins, rng)
+    stream = [rng.choice(origins) for _ in range(args.checks)]
+
+    legacy_allowed = list(ALLOWED_ORIGINS)
+    matcher = OriginMatcher(ALLOWED_ORIGINS)
+    report = {
+        "legacy_list_us_per_check": round(time_checks(lambda o: legacy_check(legacy_allowed, o), stream), 3),
+        "legacy_list_final_size": len(legacy_allowed),
+        "matcher_us_per_check": round(time_checks(matcher.is_allowed, stream), 3),
+        "matcher_decision_cache": matcher.decisions.stats(),
+    }
+    latency, statuses = asyncio.run(preflights(stream[:args.preflights]))
+    report["preflight_latency"] = latency
+    report["preflight_statuses"] = statuses
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
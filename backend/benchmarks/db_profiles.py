@@ -0,0 +1,119 @@
+"""
+Concurrent read/write throughput on SQLite with the default rollback
+journal versus the WAL profile applied by app.database.
+
+Each profile gets a fresh database file seeded with --users rows. Reader
+tasks fetch random users by id while writer tasks update and commit, the
+same shape as /me traffic running alongside signups and logins.
+
+    python -m benchmarks.db_profiles --readers 16 --writers 4 --seconds 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.common import configure_environment, summarize
+
+configure_environment()
+
+from sqlalchemy import insert, select, update  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+from app.database import (  # noqa: E402
+    Base,
+    SQLITE_PRAGMAS,
+    apply_sqlite_pragmas,
+    engine_options,
+)
+from app.models.user import User  # noqa: E402
+
+# SQLite's own defaults, except for a busy timeout so writers wait instead of failing
+ROLLBACK_PRAGMAS = {"journal_mode": "DELETE", "synchronous": "FULL", "busy_timeout": SQLITE_PRAGMAS["busy_timeout"]}
+
+PROFILES = {
+    "rollback": ROLLBACK_PRAGMAS,
+    "wal": SQLITE_PRAGMAS,
+}
+
+
+async def run_profile(name, pragmas, args):
+    tmpdir = tempfile.mkdtemp(prefix=f"ventry-db-{name}-")
+    url = f"sqlite+aiosqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    engine = create_async_engine(url, **engine_options(url, is_async=True))
+    apply_sqlite_pragmas(engine.sync_engine, pragmas)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        ids = [f"user-{i}" for i in range(args.users)]
+        await conn.execute(insert(User), [
+            {"id": user_id, "email": f"{user_id}@bench.test", "name": user_id} for user_id in ids
+        ])
+
+    reads, writes, errors = [], [], 0
+    deadline = time.perf_counter() + args.seconds
+
+    async def reader(seed):
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            async with sessions() as db:
+                await db.execute(select(User).where(User.id == rng.choice(ids)))
+            reads.append(time.perf_counter() - start)
+
+    async def writer(seed):
+        nonlocal errors
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                async with sessions() as db:
+                    await db.execute(
+                        update(User).where(User.id == rng.choice(ids)).values(name=f"n{rng.random()}")
+                    )
+                    await db.commit()
+            except Exception:
+                errors += 1
+                continue
+            writes.append(time.perf_counter() - start)
+
+    await asyncio.gather(
+        *(reader(i) for i in range(args.readers)),
+        *(writer(1000 + i) for i in range(args.writers)),
+    )
+    await engine.dispose()
+
+    return {
+        "profile": name,
+        "reads_per_s": round(len(reads) / args.seconds, 1),
+        "writes_per_s": round(len(writes) / args.seconds, 1),
+        "write_errors": errors,
+        "read_latency": summarize(reads),
+        "write_latency": summarize(writes),
+    }
+
+
+async def main_async(args):
+    results = []
+    for name in args.profiles:
+        results.append(await run_profile(name, PROFILES[name], args))
+    print(json.dumps(results, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--profiles", nargs="+", choices=sorted(PROFILES), default=["rollback", "wal"])
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Exercise the email outbox against a local aiosmtpd stand-in.
+
+Signs up --users users, requests an exclusive code for each through
+/api/auth/request-code, and reports endpoint latency, the time until every
+message reached the stand-in, and how many SMTP connections were opened.
+
+    pip install aiosmtpd
+    python -m benchmarks.email_outbox --users 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from benchmarks.common import asgi_client, configure_environment, seed_user, summarize
+
+SMTP_PORT = 8025
+
+configure_environment()
+os.environ.update({
+    "SMTP_HOST": "127.0.0.1",
+    "SMTP_PORT": str(SMTP_PORT),
+    "SMTP_USER": "bench",
+    "SMTP_PASSWORD": "bench",
+    "SMTP_STARTTLS": "false",
+    "EMAIL_FROM": "bench@example.com",
+})
+
+from aiosmtpd.controller import Controller  # noqa: E402
+from aiosmtpd.smtp import AuthResult  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.services.email import email_outbox  # noqa: E402
+
+
+class CountingHandler:
+    def __init__(self):
+        self.connections = 0
+        self.messages = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.connections += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages += 1
+        return "250 OK"
+
+
+def accept_any(server, session, envelope, mechanism, auth_data):
+    return AuthResult(success=True)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=500)
+    args = parser.parse_args()
+
+    handler = CountingHandler()
+    controller = Controller(
+        handler, hostname="127.0.0.1", port=SMTP_PORT,
+        authenticator=accept_any, auth_require_tls=False,
+    )
+    controller.start()
+    email_outbox.start()
+    try:
+        async with asgi_client(app) as client:
+            emails = [f"outbox-{i}@example.com" for i in range(args.users)]
+            for email in emails:
+                await seed_user(client, email)
+
+            latencies = []
+            start = time.perf_counter()
+            for email in emails:
+                request_start = time.perf_counter()
+                response = await client.post("/api/auth/request-code", json={"email": email})
+                latencies.append(time.perf_counter() - request_start)
+                assert response.json()["code_sent"], response.text
+
+            while handler.messages < args.users and time.perf_counter() - start < 120:
+                await asyncio.sleep(0.05)
+            delivered_after = time.perf_counter() - start
+    finally:
+        await email_outbox.stop()
+        controller.stop()
+
+    print(json.dumps({
+        "request_code_latency": summarize(latencies),
+        "messages_delivered": handler.messages,
+        "seconds_until_all_delivered": round(delivered_after, 3),
+        "smtp_connections": handler.connections,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,166 @@
+"""
+Exclusive code redemption and purging with millions of issued codes.
+
+Fills exclusive_codes with --codes rows spread over --users users, half
+of them already expired, then reports:
+
+- redeem: latency of redeem_code for valid, wrong and expired codes,
+  each one primary-key UPDATE
+- issue: latency of issue_code for a user who already has codes
+- purge: time and rows per second to delete the expired half in
+  batches, and the longest the event loop went without running
+- after: table size and redemption latency once the purge is done
+
+    python -m benchmarks.exclusive_codes --codes 2000000
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import configure_environment, summarize
+
+configure_environment()
+
+from sqlalchemy import func, insert, select  # noqa: E402
+
+from app.database import AsyncSessionLocal, async_engine, engine, init_database  # noqa: E402
+from app.models.exclusive_code import ExclusiveCode  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.exclusive_codes import ExclusiveCodePurger, hash_code, issue_code, redeem_code  # noqa: E402
+
+INSERT_BATCH = 50000
+
+
+def plain_code(i):
+    return f"C{i:07d}"
+
+
+def fill(codes, users):
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": f"user-{u}", "email": f"user-{u}@example.com", "name": "code", "hashed_password": ""}
+            for u in range(users)
+        ])
+        for start in range(0, codes, INSERT_BATCH):
+            rows = []
+            for i in range(start, min(start + INSERT_BATCH, codes)):
+                user_id = f"user-{i % users}"
+                rows.append({
+                    "code_hash": hash_code(user_id, plain_code(i)),
+                    "user_id": user_id,
+                    "created_at": now - timedelta(hours=12),
+                    # Odd codes expired an hour ago
+                    "expires_at": now + (timedelta(hours=-1) if i % 2 else timedelta(hours=12)),
+                })
+            conn.execute(insert(ExclusiveCode), rows)
+
+
+async def redeem_latencies(codes, users, samples, offset, parity):
+    latencies, redeemed = [], 0
+    for n in range(samples):
+        i = (offset + n * 2 + parity) % codes
+        start = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            ok = await redeem_code(db, f"user-{i % users}", plain_code(i))
+            await db.commit()
+        latencies.append(time.perf_counter() - start)
+        redeemed += ok
+    return {"redeemed": redeemed, "latency": summarize(latencies)}
+
+
+async def wrong_code_latencies(users, samples):
+    latencies = []
+    for n in range(samples):
+        start = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            assert not await redeem_code(db, f"user-{n % users}", "NOPE0000")
+        latencies.append(time.perf_counter() - start)
+    return {"latency": summarize(latencies)}
+
+
+async def issue_latencies(users, samples):
+    latencies = []
+    for n in range(samples):
+        start = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            await issue_code(db, f"user-{n % users}")
+        latencies.append(time.perf_counter() - start)
+    return {"latency": summarize(latencies)}
+
+
+async def purge_with_stall(purger):
+    longest, done = 0.0, False
+
+    async def ticker():
+        nonlocal longest
+        last = time.perf_counter()
+        while not done:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            longest = max(longest, now - last)
+            last = now
+
+    task = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    purged = await purger.purge()
+    elapsed = time.perf_counter() - start
+    done = True
+    await task
+    return purged, elapsed, longest
+
+
+async def table_size():
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(select(func.count()).select_from(ExclusiveCode))).scalar_one()
+
+
+async def main_async(args):
+    await init_database()
+    start = time.perf_counter()
+    fill(args.codes, args.users)
+    report = {"codes": args.codes, "fill_seconds": round(time.perf_counter() - start, 1)}
+
+    report["redeem_valid"] = await redeem_latencies(args.codes, args.users, args.samples, 0, 0)
+    report["redeem_expired"] = await redeem_latencies(args.codes, args.users, args.samples, 0, 1)
+    report["redeem_wrong"] = await wrong_code_latencies(args.users, args.samples)
+    report["issue"] = await issue_latencies(args.users, args.samples)
+
+    purged, elapsed, stall = await purge_with_stall(ExclusiveCodePurger(batch_size=args.batch_size))
+    report["purge"] = {
+        "batch_size": args.batch_size,
+        "rows_deleted": purged,
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(purged / elapsed) if elapsed else None,
+        "longest_event_loop_stall_ms": round(stall * 1000, 1),
+    }
+    report["after"] = {
+        "rows": await table_size(),
+        "redeem_valid": await redeem_latencies(args.codes, args.users, args.samples, args.samples * 2, 0),
+    }
+    await async_engine.dispose()
+
+    print(json.dumps(report, indent=2))
+    ok = (
+        report["redeem_valid"]["redeemed"] == args.samples
+        and report["redeem_expired"]["redeemed"] == 0
+        and report["after"]["redeem_valid"]["redeemed"] == args.samples
+    )
+    return 0 if ok else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--codes", type=int, default=2_000_000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Check that every hot users query is served by an index.
+
+Migrates a fresh database to head with Alembic, seeds it, and runs
+EXPLAIN on the statements the auth and users endpoints issue. Exits
+non-zero if any plan scans a table. Works on SQLite (default)
+and Postgres via BENCH_DATABASE_URL; on Postgres sequential scans are
+disabled for the check so a small table still shows whether an index
+is usable at all.
+
+    python -m benchmarks.explain_queries
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.explain_queries
+"""
+import json
+import sys
+from datetime import datetime, timedelta
+
+from benchmarks.common import configure_environment
+
+configure_environment()
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from sqlalchemy import func, insert, select, tuple_, update  # noqa: E402
+
+from app.database import engine  # noqa: E402
+from app.models.exclusive_code import ExclusiveCode  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.exclusive_codes import hash_code  # noqa: E402
+
+SEED_USERS = 2000
+
+# The statements below mirror the lookups in app/api
+HOT_QUERIES = {
+    "user by id": select(User).where(User.id == "user-42"),
+    "user by email": select(User).where(func.lower(User.email) == "user-42@bench.test"),
+    "user by provider account": select(User).where(
+        User.provider == "google", User.provider_user_id == "google-42"
+    ),
+    "exclusive code redemption": update(ExclusiveCode).where(
+        ExclusiveCode.code_hash == hash_code("user-42", "ABC123"),
+        ExclusiveCode.user_id == "user-42",
+        ExclusiveCode.used_at.is_(None),
+        ExclusiveCode.expires_at > datetime(2025, 1, 1),
+    ).values(used_at=datetime(2025, 1, 1)),
+    "exclusive codes of a user": select(ExclusiveCode.code_hash).where(ExclusiveCode.user_id == "user-42"),
+    "expired exclusive codes": select(ExclusiveCode.code_hash).where(
+        ExclusiveCode.expires_at < datetime(2025, 1, 1)
+    ).limit(5000),
+    "user listing page": select(User.id, User.email).where(
+        tuple_(User.created_at, User.id) > tuple_(datetime(2025, 1, 1), "user-42")
+    ).order_by(User.created_at, User.id).limit(101),
+}
+
+
+def seed(conn):
+    conn.execute(insert(User), [
+        {
+            "id": f"user-{i}",
+            "email": f"user-{i}@bench.test",
+            "name": f"user-{i}",
+            "provider": "google" if i % 2 else "email",
+            "provider_user_id": f"google-{i}" if i % 2 else None,
+        }
+        for i in range(SEED_USERS)
+    ])
+    conn.execute(insert(ExclusiveCode), [
+        {
+            "code_hash": hash_code(f"user-{i}", f"C{i:05d}"),
+            "user_id": f"user-{i}",
+            "created_at": datetime(2025, 1, 1),
+            "expires_at": datetime(2025, 1, 1) + timedelta(hours=i % 48),
+        }
+        for i in range(SEED_USERS)
+    ])
+
+
+def sqlite_plan(conn, sql):
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    details = [row[-1] for row in rows]
+    # "SEARCH users USING INDEX ..." is a lookup; any "SCAN" walks the whole table or index
+    return details, any(detail.startswith("SCAN") for detail in details)
+
+
+def postgres_plan(conn, sql):
+    conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    nodes = []
+
+    def walk(node):
+        nodes.append(f"{node['Node Type']} {node.get('Index Name', node.get('Relation Name', ''))}".strip())
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan[0]["Plan"])
+    return nodes, any(node.startswith("Seq Scan") for node in nodes)
+
+
+def main():
+    command.upgrade(Config("alembic.ini"), "head")
+
+    failures = 0
+    with engine.begin() as conn:
+        seed(conn)
+        if engine.dialect.name == "sqlite":
+            conn.exec_driver_sql("ANALYZE")
+            explain = sqlite_plan
+        else:
+            conn.exec_driver_sql("ANALYZE users")
+            conn.exec_driver_sql("ANALYZE exclusive_codes")
+            explain = postgres_plan
+
+        for name, statement in HOT_QUERIES.items():
+            sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+            plan, scans = explain(conn, sql)
+            failures += scans
+            print(f"{'FAIL' if scans else 'ok  '} {name}: {' | '.join(plan)}")
+
+        conn.rollback()
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Load-test harness for the auth and users API.
+
+Drives the real app.main:app either in-process through httpx's ASGI
+transport (default) or over HTTP against a locally spawned uvicorn
+(--spawn). Each scenario runs --concurrency workers for --duration
+seconds against seeded users and reports throughput plus p50/p95/p99 and
+a latency histogram. Results are written as JSON and compared against
+the baseline; the exit status is 1 on a regression. Latencies depend on
+the machine, so no baseline ships with the repo: record one with
+--save-baseline on the reference setup first, after which runs without a
+baseline exit with status 2 before any load is sent.
+
+    python -m benchmarks.loadtest --save-baseline
+    python -m benchmarks.loadtest
+    python -m benchmarks.loadtest --scenarios login,users_me --spawn
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.common import DEFAULT_PASSWORD, asgi_client, configure_environment, free_port, summarize
+
+SCENARIOS = ["signup", "login", "users_me", "users_by_id", "request_code"]
+DEFAULT_BASELINE = Path(__file__).parent / "loadtest_baseline.json"
+# Upper bounds (ms) of the latency histogram buckets; the last is open-ended
+HISTOGRAM_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma separated subset of " + ",".join(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    parser.add_argument("--users", type=int, default=50, help="seeded users")
+    parser.add_argument("--bcrypt-rounds", type=int, default=int(os.getenv("BCRYPT_ROUNDS", "4")),
+                        help="bcrypt cost for the run; low by default so hashing does not hide endpoint regressions")
+    parser.add_argument("--spawn", action="store_true", help="run against a spawned uvicorn instead of in-process")
+    parser.add_argument("--output", default="loadtest-results.json")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--max-p99-regression", type=float, default=0.25, help="allowed relative p99 increase")
+    parser.add_argument("--max-throughput-regression", type=float, default=0.20, help="allowed relative rps drop")
+    return parser.parse_args()
+
+
+def histogram(samples):
+    counts = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+    for seconds in samples:
+        ms = seconds * 1000
+        for i, bound in enumerate(HISTOGRAM_BUCKETS_MS):
+            if ms <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+    labels = [f"<={bound}ms" for bound in HISTOGRAM_BUCKETS_MS] + [f">{HISTOGRAM_BUCKETS_MS[-1]}ms"]
+    return dict(zip(labels, counts))
+
+
+class Context:
+    """
+    Seeded users shared by the scenarios
+    """
+
+    def __init__(self):
+        self.users = []  # (id, email, token)
+        self.signups = 0
+
+
+async def seed(client, count):
+    context = Context()
+    for i in range(count):
+        email = f"load-{i}@example.com"
+        response = await client.post("/api/auth/signup", json={
+            "name": f"Load {i}", "email": email, "password": DEFAULT_PASSWORD, "confirmPassword": DEFAULT_PASSWORD,
+        })
+        if response.status_code == 400:
+            response = await client.post("/api/auth/login", json={"email": email, "password": DEFAULT_PASSWORD})
+        response.raise_for_status()
+        body = response.json()
+        context.users.append((body["user"]["id"], email, body["access_token"]))
+    return context
+
+
+async def signup(client, context, rng):
+    context.signups += 1
+    email = f"signup-{os.getpid()}-{time.time_ns()}-{context.signups}@example.com"
+    return await client.post("/api/auth/signup", json={
+        "name": "Signup", "email": email, "password": DEFAULT_PASSWORD, "confirmPassword": DEFAULT_PASSWORD,
+    })
+
+
+async def login(client, context, rng):
+    _, email, _ = rng.choice(context.users)
+    return await client.post("/api/auth/login", json={"email": email, "password": DEFAULT_PASSWORD})
+
+
+async def users_me(client, context, rng):
+    _, _, token = rng.choice(context.users)
+    return await client.get("/api/users/me", headers={"Authorization": f"Bearer {token}"})
+
+
+async def users_by_id(client, context, rng):
+    _, _, token = rng.choice(context.users)
+    user_id, _, _ = rng.choice(context.users)
+    return await client.get(f"/api/users/{user_id}", headers={"Authorization": f"Bearer {token}"})
+
+
+async def request_code(client, context, rng):
+    _, email, _ = rng.choice(context.users)
+    return await client.post("/api/auth/request-code", json={"email": email})
+
+
+async def run_scenario(name, client, context, args):
+    action = globals()[name]
+    samples, errors = [], {}
+
+    async def worker(seed):
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await action(client, context, rng)
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            samples.append(time.perf_counter() - start)
+            if status not in (200, 201):
+                errors[str(status)] = errors.get(str(status), 0) + 1
+
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "throughput_rps": round(len(samples) / elapsed, 2),
+        "latency": summarize(samples),
+        "histogram": histogram(samples),
+    }
+
+
+async def spawn_server():
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=os.environ.copy(),
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    async with httpx.AsyncClient(base_url=base_url) as probe:
+        for _ in range(200):
+            try:
+                if (await probe.get("/ready")).status_code == 200:
+                    return process, base_url
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.05)
+    process.terminate()
+    raise RuntimeError("uvicorn did not start")
+
+
+def compare(results, baseline, args):
+    regressions = []
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        p99_change = (current["latency"]["p99_ms"] - previous["latency"]["p99_ms"]) / max(previous["latency"]["p99_ms"], 1e-9)
+        rps_change = (current["throughput_rps"] - previous["throughput_rps"]) / max(previous["throughput_rps"], 1e-9)
+        current["vs_baseline"] = {"p99_change": round(p99_change, 3), "throughput_change": round(rps_change, 3)}
+        if p99_change > args.max_p99_regression:
+            regressions.append(f"{name}: p99 {previous['latency']['p99_ms']}ms -> {current['latency']['p99_ms']}ms")
+        if -rps_change > args.max_throughput_regression:
+            regressions.append(f"{name}: throughput {previous['throughput_rps']} -> {current['throughput_rps']} rps")
+    return regressions
+
+
+async def main(args):
+    from app.main import app
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    if not args.save_baseline and not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; record one with --save-baseline", file=sys.stderr)
+        return 2
+
+    process = None
+    if args.spawn:
+        process, base_url = await spawn_server()
+        client = httpx.AsyncClient(base_url=base_url, limits=httpx.Limits(max_connections=args.concurrency))
+    else:
+        client = asgi_client(app)
+
+    results = {
+        "mode": "uvicorn" if args.spawn else "asgi",
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "bcrypt_rounds": args.bcrypt_rounds,
+        "scenarios": {},
+    }
+    try:
+        async with client as client:
+            context = await seed(client, args.users)
+            for name in scenarios:
+                results["scenarios"][name] = await run_scenario(name, client, context, args)
+                latency = results["scenarios"][name]["latency"]
+                print(f"{name:>13}: {results['scenarios'][name]['throughput_rps']:>9} rps  "
+                      f"p50 {latency['p50_ms']}ms  p95 {latency['p95_ms']}ms  p99 {latency['p99_ms']}ms")
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    regressions = []
+    if not args.save_baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args)
+    results["regressions"] = regressions
+
+    Path(args.output).write_text(json.dumps(results, indent=2))
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2))
+        print(f"Baseline written to {args.baseline}")
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    configure_environment()
+    os.environ["BCRYPT_ROUNDS"] = str(arguments.bcrypt_rounds)
+    sys.exit(asyncio.run(main(arguments)))
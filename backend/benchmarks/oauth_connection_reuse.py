@@ -0,0 +1,85 @@
+"""
+Check that Google OAuth callbacks reuse provider connections.
+
+Starts a mock token/userinfo provider on localhost, drives
+/api/auth/google/callback --callbacks times through the app (with its
+lifespan, so the shared httpx client is used), and reports how many
+distinct TCP connections the provider saw. With pooling this stays at the
+keep-alive pool size instead of two per callback.
+
+    python -m benchmarks.oauth_connection_reuse --callbacks 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+
+from benchmarks.common import asgi_client, configure_environment, summarize
+
+PROVIDER_PORT = 8766
+
+configure_environment()
+os.environ.update({
+    "GOOGLE_TOKEN_URL": f"http://127.0.0.1:{PROVIDER_PORT}/token",
+    "GOOGLE_USERINFO_URL": f"http://127.0.0.1:{PROVIDER_PORT}/userinfo",
+})
+
+import uvicorn  # noqa: E402
+from fastapi import FastAPI, Form, Request  # noqa: E402
+
+from app.main import app  # noqa: E402
+
+provider = FastAPI()
+provider_connections = set()
+
+
+@provider.post("/token")
+async def token(request: Request, code: str = Form(...)):
+    provider_connections.add(request.client)
+    return {"access_token": f"token-{code}"}
+
+
+@provider.get("/userinfo")
+async def userinfo(request: Request):
+    provider_connections.add(request.client)
+    code = request.headers["authorization"].rsplit("-", 1)[-1]
+    return {"id": f"google-{code}", "email": f"oauth-{code}@example.com", "name": f"OAuth {code}"}
+
+
+def start_provider() -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(provider, host="127.0.0.1", port=PROVIDER_PORT, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--callbacks", type=int, default=50)
+    args = parser.parse_args()
+
+    server = start_provider()
+    latencies = []
+    try:
+        async with asgi_client(app) as client:
+            for i in range(args.callbacks):
+                start = time.perf_counter()
+                response = await client.get("/api/auth/google/callback", params={"code": str(i)})
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.text
+    finally:
+        server.should_exit = True
+
+    print(json.dumps({
+        "callbacks": args.callbacks,
+        "provider_requests": args.callbacks * 2,
+        "provider_connections": len(provider_connections),
+        "callback_latency": summarize(latencies),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,131 @@
+"""
+Check that GET /api/users cursors stay stable while users are inserted.
+
+Seeds --users users that share a handful of created_at values, so page
+boundaries fall inside runs of equal timestamps and the id tiebreak is
+exercised. It then pages through them in both formats while a background
+task inserts --inserts pairs of users, one timestamped now and one
+backdated into pages already read. It fails unless every seeded user
+comes back exactly once and no row appears twice. Also reports page
+latency.
+
+    python -m benchmarks.pagination_stability --users 5000 --limit 137
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from benchmarks.common import asgi_client, configure_environment, summarize
+
+ADMIN_KEY = "bench-admin-key"
+
+configure_environment()
+os.environ["ADMIN_API_KEY"] = ADMIN_KEY
+
+from sqlalchemy import insert  # noqa: E402
+
+from app.database import AsyncSessionLocal  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+BASE_TIME = datetime(2025, 1, 1)
+
+
+async def insert_users(rows):
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(User), rows)
+        await db.commit()
+
+
+def user_row(created_at):
+    user_id = str(uuid.uuid4())
+    return {"id": user_id, "email": f"{user_id}@example.com", "name": "page", "provider": "email",
+            "hashed_password": "", "created_at": created_at}
+
+
+async def read_all(client, headers, fmt, limit):
+    seen, latencies, cursor = [], [], None
+    while True:
+        params = {"limit": limit, "format": fmt}
+        if cursor:
+            params["cursor"] = cursor
+        start = time.perf_counter()
+        response = await client.get("/api/users", params=params, headers=headers)
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+        if fmt == "ndjson":
+            lines = [json.loads(line) for line in response.text.splitlines()]
+            items, cursor = lines[:-1], lines[-1]["next_cursor"]
+        else:
+            body = response.json()
+            items, cursor = body["items"], body["next_cursor"]
+        seen.extend(item["id"] for item in items)
+        # Let the writer get a few inserts in between pages
+        await asyncio.sleep(0)
+        if cursor is None:
+            return seen, latencies
+
+
+async def writer(pairs, rng):
+    # Bounded, so the reader isn't chasing new rows at the end forever
+    for _ in range(pairs):
+        backdated = BASE_TIME + timedelta(seconds=rng.randrange(10))
+        await insert_users([user_row(datetime.utcnow()), user_row(backdated)])
+        await asyncio.sleep(0.001)
+    return pairs * 2
+
+
+async def main_async(args):
+    rng = random.Random(0)
+    seeded = set()
+    rows = []
+    for _ in range(args.users):
+        # Only ten distinct timestamps, so most pages start inside a tie
+        row = user_row(BASE_TIME + timedelta(seconds=rng.randrange(10)))
+        seeded.add(row["id"])
+        rows.append(row)
+    report, failed = {}, False
+
+    async with asgi_client(app) as client:
+        headers = {"X-Admin-Key": ADMIN_KEY}
+        for start in range(0, len(rows), 1000):
+            await insert_users(rows[start:start + 1000])
+
+        for fmt in ("json", "ndjson"):
+            writer_task = asyncio.create_task(writer(args.inserts, rng))
+            seen, latencies = await read_all(client, headers, fmt, args.limit)
+            inserted = await writer_task
+
+            duplicates = len(seen) - len(set(seen))
+            missing = len(seeded - set(seen))
+            failed = failed or duplicates > 0 or missing > 0
+            report[fmt] = {
+                "pages": len(latencies),
+                "rows_seen": len(seen),
+                "inserted_while_paging": inserted,
+                "duplicates": duplicates,
+                "missing_seeded": missing,
+                "page_latency": summarize(latencies),
+            }
+
+    print(json.dumps(report, indent=2))
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--limit", type=int, default=137, help="page size; odd so pages split ties")
+    parser.add_argument("--inserts", type=int, default=200, help="pairs of users inserted while paging")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
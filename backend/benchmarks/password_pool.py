@@ -0,0 +1,85 @@
+"""
+/users/me latency while concurrent logins saturate the password hashing pool.
+
+Runs the same workload twice: once hashing inline on the event loop (the old
+behaviour) and once through the bounded pool configured by
+PASSWORD_HASH_WORKERS / PASSWORD_HASH_BACKEND / PASSWORD_HASH_MAX_QUEUE.
+
+    python -m benchmarks.password_pool --logins 8 --duration 5
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.common import DEFAULT_PASSWORD, asgi_client, configure_environment, seed_user, summarize
+
+configure_environment()
+
+from app.config import PASSWORD_HASH_BACKEND, PASSWORD_HASH_MAX_QUEUE, PASSWORD_HASH_WORKERS  # noqa: E402
+from app.core import security  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+async def me_loop(client, token, deadline, samples):
+    headers = {"Authorization": f"Bearer {token}"}
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.get("/api/users/me", headers=headers)
+        samples.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.text
+
+
+async def login_loop(client, email, deadline, counts):
+    while time.perf_counter() < deadline:
+        response = await client.post("/api/auth/login", json={"email": email, "password": DEFAULT_PASSWORD})
+        counts[response.status_code] = counts.get(response.status_code, 0) + 1
+        if response.status_code == 503:
+            await asyncio.sleep(0.01)
+
+
+async def run_mode(name, hasher, logins, duration):
+    security.password_hasher = hasher
+    async with asgi_client(app) as client:
+        token = await seed_user(client, "bench-me@example.com")
+        email = "bench-login@example.com"
+        await seed_user(client, email)
+
+        idle = []
+        await me_loop(client, token, time.perf_counter() + duration / 2, idle)
+
+        loaded, counts = [], {}
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(
+            me_loop(client, token, deadline, loaded),
+            *(login_loop(client, email, deadline, counts) for _ in range(logins)),
+        )
+    hasher.shutdown()
+    return {
+        "mode": name,
+        "users_me_idle": summarize(idle),
+        "users_me_under_login_load": summarize(loaded),
+        "login_status_counts": counts,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=8, help="concurrent login loops")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per loaded phase")
+    args = parser.parse_args()
+
+    results = [
+        await run_mode("inline", security.PasswordHasher(0), args.logins, args.duration),
+        await run_mode(
+            f"pool({PASSWORD_HASH_BACKEND}, workers={PASSWORD_HASH_WORKERS}, queue={PASSWORD_HASH_MAX_QUEUE})",
+            security.PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_BACKEND, PASSWORD_HASH_MAX_QUEUE),
+            args.logins,
+            args.duration,
+        ),
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,214 @@
+"""
+Token revocation with a Bloom filter in front of revoked_tokens.
+
+Fills the table with --revoked revoked token ids (a tenth already
+expired) and reports:
+
+- filter: size, hash count, memory next to a Python set of the same
+  ids, and the measured false positive rate over --probes ids that were
+  never revoked
+- load: time to rebuild the filter from the table, and the longest the
+  event loop went without running while it did
+- requests: latency and SQL statements per authenticated request with
+  the filter loaded, and with it unloaded, when every token is checked
+  against the table
+- prune: rows deleted and filter size after the expired tokens are gone
+- a token logged out while the filter is being rebuilt is still
+  rejected once the new filter is swapped in
+
+    python -m benchmarks.revocation_bloom --revoked 1000000
+"""
+import argparse
+import asyncio
+import gc
+import json
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+from benchmarks.common import asgi_client, configure_environment, seed_user, summarize
+
+configure_environment()
+
+from sqlalchemy import insert  # noqa: E402
+
+from app.core.bloom import BloomFilter  # noqa: E402
+from app.core.metrics import db_query_duration  # noqa: E402
+from app.database import engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.revoked_token import RevokedToken  # noqa: E402
+from app.services.revocation import revocation_list  # noqa: E402
+
+INSERT_BATCH = 50000
+
+
+def statements_run() -> int:
+    return sum(sum(series.counts) for series in db_query_duration._series.values())
+
+
+def allocated(build):
+    tracemalloc.start()
+    value = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size
+
+
+def filter_report(jtis, probes, error_rate):
+    start = time.perf_counter()
+    bloom, bloom_bytes = allocated(lambda: BloomFilter(len(jtis), error_rate))
+    for jti in jtis:
+        bloom.add(jti)
+    build_seconds = time.perf_counter() - start
+    _, set_bytes = allocated(lambda: set(jti.encode().decode() for jti in jtis))
+
+    start = time.perf_counter()
+    false_positives = sum(1 for jti in probes if jti in bloom)
+    lookup_seconds = time.perf_counter() - start
+    return {
+        "keys": len(jtis),
+        "target_error_rate": error_rate,
+        "measured_false_positive_rate": false_positives / len(probes),
+        "bits": bloom.num_bits,
+        "hashes": bloom.num_hashes,
+        "filter_mib": round(bloom_bytes / 2**20, 2),
+        "python_set_mib": round(set_bytes / 2**20, 2),
+        "build_seconds": round(build_seconds, 2),
+        "lookup_us": round(lookup_seconds / len(probes) * 1e6, 3),
+    }
+
+
+def fill_table(jtis):
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        for start in range(0, len(jtis), INSERT_BATCH):
+            conn.execute(insert(RevokedToken), [
+                {
+                    "jti": jti,
+                    "user_id": "bench",
+                    # Every tenth token expired an hour ago
+                    "expires_at": now - timedelta(hours=1) if i % 10 == 0 else now + timedelta(days=1),
+                    "revoked_at": now,
+                }
+                for i, jti in enumerate(jtis[start:start + INSERT_BATCH], start)
+            ])
+
+
+async def longest_stall(work):
+    """
+    Run work while a ticker measures the longest gap between its ticks
+    """
+    longest = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal longest
+        last = time.perf_counter()
+        while not done:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            longest = max(longest, now - last)
+            last = now
+
+    task = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    await work()
+    elapsed = time.perf_counter() - start
+    done = True
+    await task
+    return elapsed, longest
+
+
+async def request_report(client, path, headers, requests):
+    latencies = []
+    before = statements_run()
+    checks_before = revocation_list.db_checks
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = await client.get(path, headers=headers)
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.text
+    return {
+        "statements_per_request": round((statements_run() - before) / requests, 3),
+        "revocation_checks_per_request": round((revocation_list.db_checks - checks_before) / requests, 3),
+        "latency": summarize(latencies),
+    }
+
+
+async def main_async(args):
+    jtis = [uuid.uuid4().hex for _ in range(args.revoked)]
+    probes = [uuid.uuid4().hex for _ in range(args.probes)]
+    report = {"filter": filter_report(jtis, probes, revocation_list.error_rate)}
+    # The id lists above are the benchmark's own; keep the collector from
+    # rescanning them, so stalls measured below come from the app
+    gc.collect()
+    gc.freeze()
+
+    async with asgi_client(app) as client:
+        token = await seed_user(client, "revoker@example.com")
+        headers = {"Authorization": f"Bearer {token}"}
+        user_id = (await client.get("/api/users/me", headers=headers)).json()["id"]
+        await revocation_list.stop()
+
+        start = time.perf_counter()
+        fill_table(jtis)
+        report["table_fill_seconds"] = round(time.perf_counter() - start, 2)
+
+        elapsed, stall = await longest_stall(revocation_list.rebuild)
+        report["load"] = {
+            "rows": revocation_list.size,
+            "filter_mib": round(revocation_list.nbytes / 2**20, 2),
+            "seconds": round(elapsed, 2),
+            "longest_event_loop_stall_ms": round(stall * 1000, 1),
+        }
+
+        path = f"/api/users/{user_id}"
+        await client.get(path, headers=headers)
+        report["requests"] = {"filter_loaded": await request_report(client, path, headers, args.requests)}
+        loaded = revocation_list._filter
+        revocation_list._filter = None
+        report["requests"]["filter_unloaded"] = await request_report(client, path, headers, args.requests)
+        revocation_list._filter = loaded
+
+        pruned = await revocation_list.prune()
+        report["prune"] = {"rows_deleted": pruned, "rows_loaded_after": revocation_list.size}
+
+        # Log a second token out while a rebuild streams the table
+        during_token = await seed_user(client, "revoker@example.com")
+        during_headers = {"Authorization": f"Bearer {during_token}"}
+        rebuild = asyncio.create_task(revocation_list.rebuild())
+        await asyncio.sleep(0.05)
+        mid_rebuild = not rebuild.done()
+        await client.post("/api/auth/logout", headers=during_headers)
+        await rebuild
+        during_status = (await client.get(path, headers=during_headers)).status_code
+        report["revoked_during_rebuild"] = {"mid_rebuild": mid_rebuild, "status": during_status}
+
+        # A token revoked through the API is rejected right away
+        await client.post("/api/auth/logout", headers=headers)
+        revoked_status = (await client.get(path, headers=headers)).status_code
+        report["revoked_token_status"] = revoked_status
+
+    print(json.dumps(report, indent=2))
+    ok = (
+        report["filter"]["measured_false_positive_rate"] <= revocation_list.error_rate * 2
+        and report["requests"]["filter_loaded"]["revocation_checks_per_request"] == 0
+        and revoked_status == 401
+        and during_status == 401
+    )
+    return 0 if ok else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--revoked", type=int, default=1_000_000)
+    parser.add_argument("--probes", type=int, default=1_000_000, help="never-revoked ids tested for false positives")
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Per-response serialization cost of user and token payloads.
+
+Serializes the same User row, alone and inside a Token, four ways:
+
+- fastapi: what a route with response_model does, validating the ORM
+  object against the model and rendering a JSONResponse (the old path)
+- fastapi_orjson: the same with ORJSONResponse, now the default class
+- type_adapter: a precompiled pydantic TypeAdapter, validate + dump_json
+  into a plain Response
+- direct: app.api.responses, ORM attributes straight to orjson bytes
+
+Checks that every way produces the same JSON, then reports microseconds
+per response.
+
+    python -m benchmarks.serialization --iterations 50000
+"""
+import argparse
+import json
+import sys
+import time
+import uuid
+from datetime import datetime
+
+from benchmarks.common import configure_environment
+
+configure_environment()
+
+from fastapi import Response  # noqa: E402
+from fastapi.responses import JSONResponse, ORJSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from app.api.responses import token_response, user_response  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.schemas.auth import Token, UserResponse  # noqa: E402
+
+
+def sample_user():
+    return User(
+        id=str(uuid.uuid4()),
+        email="serialize@example.com",
+        name="Serialize Me",
+        is_active=True,
+        is_verified=True,
+        created_at=datetime(2025, 4, 8, 9, 30, 15, 123456),
+        provider="google",
+        exclusive_access=False,
+    )
+
+
+def render_ways(model, payload, direct):
+    field = create_response_field(name="response", type_=model)
+    adapter = TypeAdapter(model)
+
+    def fastapi_with(response_class):
+        def render():
+            # serialize_response never awaits for async routes; step it by hand
+            # so the timing doesn't include starting an event loop
+            try:
+                serialize_response(field=field, response_content=payload).send(None)
+            except StopIteration as done:
+                return response_class(done.value).body
+        return render
+
+    return {
+        "fastapi": fastapi_with(JSONResponse),
+        "fastapi_orjson": fastapi_with(ORJSONResponse),
+        "type_adapter": lambda: Response(
+            adapter.dump_json(adapter.validate_python(payload, from_attributes=True)),
+            media_type="application/json",
+        ).body,
+        "direct": lambda: direct(payload).body,
+    }
+
+
+def time_per_call(render, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        render()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=50000)
+    args = parser.parse_args()
+
+    user = sample_user()
+    tokens = {"access_token": "a" * 300, "refresh_token": "r" * 200, "token_type": "bearer", "user": user}
+    cases = {
+        "user": render_ways(UserResponse, user, user_response),
+        "token": render_ways(Token, tokens, token_response),
+    }
+
+    report, mismatched = {}, False
+    for name, ways in cases.items():
+        bodies = {way: json.loads(render()) for way, render in ways.items()}
+        mismatched = mismatched or any(body != bodies["fastapi"] for body in bodies.values())
+
+        timings = {way: time_per_call(render, args.iterations) for way, render in ways.items()}
+        report[name] = {
+            **{f"{way}_us": round(seconds * 1e6, 2) for way, seconds in timings.items()},
+            "direct_speedup": round(timings["fastapi"] / timings["direct"], 1),
+        }
+
+    report["same_json"] = not mismatched
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if mismatched else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Throughput of `python main.py` in development mode against the
+production launcher, and a check that production mode drains on SIGTERM.
+
+Each mode is spawned on its own port against the same SQLite file:
+
+- development: one process under the reloader, uvicorn's defaults
+- production_asyncio_h11: the launcher with SERVER_LOOP=asyncio and
+  SERVER_HTTP=h11, one worker
+- production_1_worker: the launcher with uvloop and httptools
+- production_N_workers: the same with --workers (the CPU count by
+  default), when that is more than one
+
+For each, --connections keep-alive connections send requests back to back
+for --duration seconds to GET / and GET /api/users/me, and requests per
+second and latency are reported. The load generator is a bare asyncio
+HTTP/1.1 client in this process, so on a machine with few cores it
+competes with the server for CPU; compare modes with each other, not
+with absolute numbers from elsewhere.
+
+Then --drain signups (bcrypt at 12 rounds, so each takes a while) are
+started against a production server, which gets SIGTERM while they are
+in flight. All of them should still succeed and the server should exit 0.
+
+    python -m benchmarks.server_modes --duration 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.common import DEFAULT_PASSWORD, configure_environment, free_port, seed_user, summarize
+
+configure_environment()
+# Cheap hashing while measuring throughput; the drain check raises it
+os.environ["BCRYPT_ROUNDS"] = "4"
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+CONTENT_LENGTH = re.compile(rb"content-length: *(\d+)", re.IGNORECASE)
+
+
+def spawn(args, env=None):
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "main.py", *args],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "PORT": str(port), "SERVER_HOST": "127.0.0.1", **(env or {})},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    return process, port
+
+
+async def wait_ready(port, process, timeout=60.0):
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+        while time.perf_counter() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"server exited with {process.returncode}")
+            try:
+                if (await client.get("/ready")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.05)
+    raise RuntimeError("server was not ready in time")
+
+
+def stop(process):
+    process.send_signal(signal.SIGTERM)
+    try:
+        return process.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        return process.wait()
+
+
+async def hammer(port, path, headers, connections, duration):
+    """
+    Requests per second over keep-alive connections, each sending its
+    next request as soon as the previous response is read
+    """
+    request = (
+        f"GET {path} HTTP/1.1\r\nHost: bench\r\n"
+        + "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        + "\r\n"
+    ).encode()
+    latencies, failures = [], 0
+
+    async def connection():
+        nonlocal failures
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                writer.write(request)
+                head = await reader.readuntil(b"\r\n\r\n")
+                await reader.readexactly(int(CONTENT_LENGTH.search(head).group(1)))
+                latencies.append(time.perf_counter() - start)
+                if not head.startswith(b"HTTP/1.1 200"):
+                    failures += 1
+        finally:
+            writer.close()
+
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(connection() for _ in range(connections)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests_per_second": round(len(latencies) / elapsed),
+        "failures": failures,
+        "latency": summarize(latencies),
+    }
+
+
+async def measure_mode(name, launch_args, env, args):
+    process, port = spawn(launch_args, env)
+    try:
+        await wait_ready(port, process)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+            token = await seed_user(client, "modes@example.com")
+        # Let every worker finish starting before load begins
+        await asyncio.sleep(2)
+        headers = {"Authorization": f"Bearer {token}"}
+        await hammer(port, "/", {}, args.connections, 1)
+        result = {
+            "health": await hammer(port, "/", {}, args.connections, args.duration),
+            "users_me": await hammer(port, "/api/users/me", headers, args.connections, args.duration),
+        }
+    finally:
+        result_code = stop(process)
+    print(f"{name:>24}: / {result['health']['requests_per_second']:>6} rps   "
+          f"/api/users/me {result['users_me']['requests_per_second']:>6} rps", file=sys.stderr)
+    result["exit_code"] = result_code
+    return result
+
+
+async def check_drain(args):
+    process, port = spawn(["--production", "--workers", str(args.workers)], {"BCRYPT_ROUNDS": "12"})
+    await wait_ready(port, process)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60) as client:
+        signups = [
+            asyncio.create_task(client.post("/api/auth/signup", json={
+                "name": "drain", "email": f"drain-{i}@example.com",
+                "password": DEFAULT_PASSWORD, "confirmPassword": DEFAULT_PASSWORD,
+            }))
+            for i in range(args.drain)
+        ]
+        await asyncio.sleep(0.2)
+        signalled = time.perf_counter()
+        process.send_signal(signal.SIGTERM)
+        responses = await asyncio.gather(*signups, return_exceptions=True)
+        exit_code = await asyncio.to_thread(process.wait, 60)
+        exited_after = time.perf_counter() - signalled
+        try:
+            await client.get("/ready")
+            refused = False
+        except httpx.TransportError:
+            refused = True
+
+    statuses = {}
+    for response in responses:
+        key = str(response.status_code) if isinstance(response, httpx.Response) else type(response).__name__
+        statuses[key] = statuses.get(key, 0) + 1
+    return {
+        "in_flight_signups": args.drain,
+        "statuses": statuses,
+        "exit_code": exit_code,
+        "seconds_from_sigterm_to_exit": round(exited_after, 2),
+        "new_connections_refused": refused,
+    }
+
+
+async def main_async(args):
+    modes = [
+        ("development", [], {}),
+        ("production_asyncio_h11", ["--production", "--workers", "1"], {"SERVER_LOOP": "asyncio", "SERVER_HTTP": "h11"}),
+        ("production_1_worker", ["--production", "--workers", "1"], {}),
+    ]
+    if args.workers > 1:
+        modes.append((f"production_{args.workers}_workers", ["--production", "--workers", str(args.workers)], {}))
+
+    report = {"cpus": os.cpu_count(), "connections": args.connections, "duration_s": args.duration, "modes": {}}
+    for name, launch_args, env in modes:
+        report["modes"][name] = await measure_mode(name, launch_args, env, args)
+    report["drain"] = await check_drain(args)
+
+    print(json.dumps(report, indent=2))
+    drain = report["drain"]
+    ok = drain["statuses"] == {"201": args.drain} and drain["exit_code"] == 0 and drain["new_connections_refused"]
+    return 0 if ok else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per endpoint and mode")
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--drain", type=int, default=8, help="signups in flight at SIGTERM")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Startup cost of the API, to track across releases.
+
+- import: `python -X importtime -c "import app.main"`; reports the total
+  import time and the slowest modules by cumulative time
+- first response: spawns uvicorn and polls until / answers (process is
+  serving) and until /ready answers 200 (database initialized)
+
+Medians over --runs runs are reported as JSON, and written to --output.
+
+    python -m benchmarks.startup --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.common import configure_environment, free_port
+
+configure_environment()
+
+
+def parse_importtime(stderr: str):
+    """
+    Map module name to (self_us, cumulative_us) from -X importtime output
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def measure_import(top: int):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        env=os.environ.copy(), capture_output=True, text=True, check=True,
+    )
+    modules = parse_importtime(result.stderr)
+    slowest = sorted(modules.items(), key=lambda item: item[1][1], reverse=True)[:top]
+    return modules["app.main"][1] / 1000, {name: round(cumulative / 1000, 1) for name, (_, cumulative) in slowest}
+
+
+def measure_first_response(timeout: float):
+    port = free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=os.environ.copy(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    first_response = ready = None
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+            while ready is None and time.perf_counter() - start < timeout:
+                try:
+                    if first_response is None:
+                        client.get("/")
+                        first_response = time.perf_counter() - start
+                    if client.get("/ready").status_code == 200:
+                        ready = time.perf_counter() - start
+                        break
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.005)
+    finally:
+        process.terminate()
+        process.wait()
+    if ready is None:
+        raise RuntimeError(f"uvicorn was not ready within {timeout}s")
+    return first_response * 1000, ready * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--output", default="startup-results.json")
+    args = parser.parse_args()
+
+    import_ms, first_ms, ready_ms = [], [], []
+    slowest = {}
+    for _ in range(args.runs):
+        total, slowest = measure_import(args.top)
+        import_ms.append(total)
+        first, ready = measure_first_response(args.timeout)
+        first_ms.append(first)
+        ready_ms.append(ready)
+
+    results = {
+        "runs": args.runs,
+        "import_app_main_ms": round(statistics.median(import_ms), 1),
+        "first_response_ms": round(statistics.median(first_ms), 1),
+        "ready_ms": round(statistics.median(ready_ms), 1),
+        "slowest_imports_ms": slowest,
+    }
+    Path(args.output).write_text(json.dumps(results, indent=2))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
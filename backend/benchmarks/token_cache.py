@@ -0,0 +1,94 @@
+"""
+Cost of verifying repeated bearer tokens: jwt.decode per request versus
+the verified-token cache in app.core.security.
+
+Reports per-request cost and the share of one core needed to sustain
+--rate requests per second (default 10k req/s) for each path, and how
+many live tokens still hit the cache when each live request is
+followed by --junk-per-live never-seen junk tokens.
+
+    python -m benchmarks.token_cache --tokens 1000 --requests 200000
+"""
+import argparse
+import json
+import random
+import time
+
+from benchmarks.common import configure_environment
+
+configure_environment()
+
+import jwt  # noqa: E402
+
+from app.config import ALGORITHM, SECRET_KEY  # noqa: E402
+from app.core import security  # noqa: E402
+
+
+def measure(name, verify, stream, rate):
+    start = time.perf_counter()
+    for token in stream:
+        verify(token)
+    elapsed = time.perf_counter() - start
+    per_request_us = elapsed / len(stream) * 1_000_000
+    return {
+        "path": name,
+        "requests": len(stream),
+        "per_request_us": round(per_request_us, 3),
+        "core_share_at_rate": round(per_request_us * rate / 1_000_000, 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tokens", type=int, default=1000, help="distinct live tokens")
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--rate", type=int, default=10_000, help="req/s used for the core share figure")
+    parser.add_argument("--junk-per-live", type=int, default=100, help="unique junk tokens after each live one in the flood")
+    args = parser.parse_args()
+
+    tokens = [security.create_access_token({"sub": f"user-{i}"}) for i in range(args.tokens)]
+    rng = random.Random(0)
+    stream = [rng.choice(tokens) for _ in range(args.requests)]
+    junk = [f"junk.{i % 100}.token" for i in range(args.requests)]
+
+    def decode_each_time(token):
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+    def decode_junk_each_time(token):
+        try:
+            jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except jwt.PyJWTError:
+            pass
+
+    def cached_junk(token):
+        try:
+            security.decode_access_token(token)
+        except jwt.PyJWTError:
+            pass
+
+    results = [
+        measure("decode_per_request", decode_each_time, stream, args.rate),
+        measure("cached", security.decode_access_token, stream, args.rate),
+        measure("junk_decode_per_request", decode_junk_each_time, junk, args.rate),
+        measure("junk_cached", cached_junk, junk, args.rate),
+    ]
+
+    # Unique junk must not push live tokens out of the verified cache
+    live = stream[:args.requests // args.junk_per_live]
+    flood = []
+    for i, token in enumerate(live):
+        flood.append(token)
+        flood.extend(f"flood.{i}.{j}.token" for j in range(args.junk_per_live))
+    hits_before = security.token_cache.hits
+    results.append(measure("cached_under_junk_flood", cached_junk, flood, args.rate))
+    results[-1]["live_token_hit_rate"] = round((security.token_cache.hits - hits_before) / len(live), 4)
+
+    print(json.dumps({
+        "cache": security.token_cache.stats(),
+        "rejected_cache": security.rejected_token_cache.stats(),
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
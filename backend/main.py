@@ -1,7 +1,108 @@
 """
 Entry point script to run the application
+
+    python main.py               # one process, reloads on code changes
+    python main.py --production  # WEB_CONCURRENCY workers, no reloader
+
+Settings come from the environment; see the Server section of app/config.py.
 """
+import argparse
+import importlib.util
+import logging
+import sys
+
 import uvicorn
+from uvicorn.main import STARTUP_FAILURE
+from uvicorn.supervisors import Multiprocess
+
+from app.config import (
+    SERVER_MODE,
+    SERVER_HOST,
+    SERVER_PORT,
+    SERVER_WORKERS,
+    SERVER_LOOP,
+    SERVER_HTTP,
+    SERVER_KEEPALIVE_SECONDS,
+    SERVER_BACKLOG,
+    SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+    SERVER_LIMIT_CONCURRENCY,
+    SERVER_FORWARDED_ALLOW_IPS,
+    SERVER_ACCESS_LOG
+)
+
+logger = logging.getLogger("uvicorn.error")
+
+def choose(setting: str, fast: str, fallback: str) -> str:
+    """
+    Resolve "auto" to the C implementation when it is installed
+    """
+    if setting != "auto":
+        return setting
+    return fast if importlib.util.find_spec(fast) else fallback
+
+class DrainingMultiprocess(Multiprocess):
+    """
+    uvicorn's supervisor signals one worker and waits for it to exit
+    before signalling the next, so draining N workers takes N times as
+    long. Signal them all first; each stops accepting, finishes its
+    in-flight requests and runs the lifespan shutdown in parallel.
+    """
+
+    def shutdown(self) -> None:
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.join()
+        logger.info(f"Stopped {len(self.processes)} worker(s)")
+
+def run_development() -> None:
+    uvicorn.run(
+        "app.main:app",
+        host=SERVER_HOST,
+        port=SERVER_PORT,
+        reload=True,
+        forwarded_allow_ips=SERVER_FORWARDED_ALLOW_IPS
+    )
+
+def run_production(workers: int) -> None:
+    loop = choose(SERVER_LOOP, "uvloop", "asyncio")
+    http = choose(SERVER_HTTP, "httptools", "h11")
+    config = uvicorn.Config(
+        "app.main:app",
+        host=SERVER_HOST,
+        port=SERVER_PORT,
+        workers=workers,
+        loop=loop,
+        http=http,
+        timeout_keep_alive=SERVER_KEEPALIVE_SECONDS,
+        backlog=SERVER_BACKLOG,
+        timeout_graceful_shutdown=SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+        limit_concurrency=SERVER_LIMIT_CONCURRENCY or None,
+        # request.client is the original client, as the login throttle needs
+        proxy_headers=True,
+        forwarded_allow_ips=SERVER_FORWARDED_ALLOW_IPS,
+        access_log=SERVER_ACCESS_LOG,
+    )
+    server = uvicorn.Server(config)
+    logger.info(f"Starting {workers} worker(s) with {loop} loop and {http} parser")
+    if workers > 1:
+        sock = config.bind_socket()
+        DrainingMultiprocess(config, target=server.run, sockets=[sock]).run()
+    else:
+        # Drains on SIGTERM the same way, in this process
+        server.run()
+        if not server.started:
+            sys.exit(STARTUP_FAILURE)
 
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the Ventry API")
+    parser.add_argument("--production", action="store_true", default=SERVER_MODE == "production",
+                        help="multi-worker server without reload (also SERVER_MODE=production)")
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS,
+                        help="worker processes in production mode (also WEB_CONCURRENCY)")
+    args = parser.parse_args()
+
+    if args.production:
+        run_production(max(args.workers, 1))
+    else:
+        run_development()
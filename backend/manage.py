@@ -0,0 +1,117 @@
+"""
+Management commands for the backend
+
+Usage:
+    python manage.py calibrate-hashing --target-ms 250 [--argon2]
+    python manage.py import-users users.csv [--workers 4] [--chunk-size 5000]
+    python manage.py export-users users.jsonl [--no-hashes]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+
+def calibrate_hashing(args: argparse.Namespace) -> int:
+    from app.core.hash_calibration import calibrate_argon2, calibrate_bcrypt
+
+    reports = [calibrate_bcrypt(args.target_ms, args.samples)]
+    if args.argon2:
+        try:
+            reports.append(calibrate_argon2(args.target_ms, args.samples))
+        except Exception as e:
+            print(f"argon2 calibration failed (is argon2-cffi installed?): {e}", file=sys.stderr)
+            return 1
+
+    for report in reports:
+        print(json.dumps(report, indent=2), file=sys.stderr)
+
+    # Settings to copy into .env; existing hashes migrate on next login
+    schemes = "argon2,bcrypt" if args.argon2 else "bcrypt"
+    print(f"PASSWORD_HASH_SCHEMES={schemes}")
+    for report in reports:
+        for name, value in report["settings"].items():
+            print(f"{name}={value}")
+    return 0
+
+
+def import_users(args: argparse.Namespace) -> int:
+    from app.database import engine
+    from app.services.user_transfer import detect_format, import_users, open_input, read_records
+
+    fmt = detect_format(args.path, args.format)
+    start = time.perf_counter()
+
+    def progress(report):
+        if not args.quiet:
+            rate = report.read / max(time.perf_counter() - start, 1e-9)
+            print(f"read {report.read} inserted {report.inserted} ({rate:.0f} rows/s)", file=sys.stderr)
+
+    with open_input(args.path) as stream:
+        report = import_users(
+            engine, read_records(stream, fmt),
+            chunk_size=args.chunk_size, workers=args.workers, progress=progress,
+        )
+
+    for error in report.error_samples:
+        print(error, file=sys.stderr)
+    summary = report.as_dict()
+    summary["seconds"] = round(time.perf_counter() - start, 2)
+    print(json.dumps(summary))
+    return 1 if report.errors else 0
+
+
+def export_users(args: argparse.Namespace) -> int:
+    from app.database import engine
+    from app.services.user_transfer import detect_format, export_users, open_output
+
+    fmt = detect_format(args.path, args.format)
+    start = time.perf_counter()
+    with open_output(args.path) as stream:
+        count = export_users(engine, stream, fmt, include_hashes=not args.no_hashes, batch_size=args.batch_size)
+    print(json.dumps({"exported": count, "seconds": round(time.perf_counter() - start, 2)}), file=sys.stderr)
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Ventry backend management commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    calibrate = commands.add_parser(
+        "calibrate-hashing",
+        help="Benchmark password hashing on this host and suggest cost settings",
+    )
+    calibrate.add_argument("--target-ms", type=float, default=250.0, help="target verify time per login")
+    calibrate.add_argument("--samples", type=int, default=3, help="timed verifies per setting")
+    calibrate.add_argument("--argon2", action="store_true", help="also calibrate argon2 and prefer it")
+    calibrate.set_defaults(handler=calibrate_hashing)
+
+    importer = commands.add_parser(
+        "import-users",
+        help="Bulk insert users from CSV or JSONL; existing users are skipped",
+    )
+    importer.add_argument("path", help="input file, or - for stdin")
+    importer.add_argument("--format", choices=["csv", "jsonl"], help="defaults to the file extension")
+    importer.add_argument("--chunk-size", type=int, default=5000, help="rows per transaction")
+    importer.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                          help="processes hashing plaintext passwords (0 hashes inline)")
+    importer.add_argument("--quiet", action="store_true", help="no per-chunk progress")
+    importer.set_defaults(handler=import_users)
+
+    exporter = commands.add_parser(
+        "export-users",
+        help="Stream all users to CSV or JSONL",
+    )
+    exporter.add_argument("path", help="output file, or - for stdout")
+    exporter.add_argument("--format", choices=["csv", "jsonl"], help="defaults to the file extension")
+    exporter.add_argument("--no-hashes", action="store_true", help="leave out hashed_password")
+    exporter.add_argument("--batch-size", type=int, default=5000, help="rows fetched per cursor round trip")
+    exporter.set_defaults(handler=export_users)
+
+    args = parser.parse_args()
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())